@@ -1,56 +1,791 @@
 # app/cache_service.py
+import asyncio
 import sqlite3
 import json
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional
+
+from .formatter import dumps
+from .memory_cache import MemoryCache
+
+
+PRAGMAS = (
+    # first: it only takes effect before the file has any content, and
+    # older files keep auto_vacuum=NONE (no compaction) until a full VACUUM
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-8000",
+)
+
+# Stored payloads start with a format byte, so the encoding can change
+# without a migration. Rows written before the binary format hold JSON text.
+FORMAT_JSON = 1       # compact UTF-8 JSON
+FORMAT_ZLIB_JSON = 2  # zlib-compressed compact JSON
+COMPRESS_MIN_BYTES = 512
+COMPRESS_LEVEL = 6
+
+# Layout of the cache table, kept in PRAGMA user_version.
+SCHEMA_VERSION = 2
+
+# Eviction brings the cache down to this share of its bound, so it does
+# not run again as soon as the next entry is written.
+EVICT_TO = 0.9
+
+
+def pack_payload(raw: bytes) -> bytes:
+    """Add the format byte to encoded JSON, compressing larger bodies."""
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        return bytes((FORMAT_ZLIB_JSON,)) + zlib.compress(raw, COMPRESS_LEVEL)
+    return bytes((FORMAT_JSON,)) + raw
+
+
+def unpack_payload(data):
+    if isinstance(data, str):
+        return json.loads(data)
+    fmt, body = data[0], memoryview(data)[1:]
+    if fmt == FORMAT_ZLIB_JSON:
+        return json.loads(zlib.decompress(body))
+    if fmt == FORMAT_JSON:
+        return json.loads(bytes(body))
+    raise ValueError(f"unknown cache payload format {fmt}")
 
 
 class SQLiteCache:
-    def __init__(self, db_path: str, ttl_days: int = 14):
+    """
+    SQLite-backed cache that never touches the disk on the event loop.
+
+    Reads go through one long-lived connection on its own thread. Writes
+    are queued and committed in batches by a writer task on a second
+    connection/thread, so a burst of misses costs one fsync per batch
+    rather than one per key. Both connections run in WAL mode so readers
+    are not blocked by the writer. Call ``start()`` from a running loop to
+    enable the writer and the background maintenance; without it, ``set``
+    writes through directly.
+
+    Entries older than ``ttl_days`` (the soft TTL) are still returned, as
+    stale, until ``hard_ttl_days``; only then are they treated as missing
+    and purged. A payload with a ``_ttl`` field (seconds; LookupService
+    sets it to its shortest-lived source) goes stale sooner.
+
+    Payloads are stored as compact JSON, zlib-compressed above
+    COMPRESS_MIN_BYTES, behind a format byte. With ``max_entries`` and/or
+    ``max_bytes`` (stored key and payload bytes), the maintenance loop evicts
+    least recently (``eviction="lru"``) or least frequently (``"lfu"``)
+    used entries, in short transactions so queued writes are not held up,
+    then returns the freed pages with incremental vacuum. Access times and
+    hit counts are collected in memory and written by the same loop.
+    """
+
+    def __init__(self, db_path: str, ttl_days: int = 14, hard_ttl_days: Optional[int] = None,
+                 batch_size: int = 64, flush_interval: float = 0.05, purge_interval: float = 3600.0,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None, eviction: str = "lru",
+                 maintenance_interval: float = 60.0, evict_batch: int = 500, vacuum_pages: int = 256):
+        if eviction not in ("lru", "lfu"):
+            raise ValueError(f"eviction must be 'lru' or 'lfu', not {eviction!r}")
         self.db_path = db_path
         self.ttl = timedelta(days=ttl_days)
+        self.hard_ttl = max(timedelta(days=hard_ttl_days or ttl_days * 2), self.ttl)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.purge_interval = purge_interval
+        self.max_entries = max_entries or None
+        self.max_bytes = max_bytes or None
+        self.eviction = eviction
+        self.maintenance_interval = maintenance_interval
+        self.evict_batch = evict_batch
+        self.vacuum_pages = vacuum_pages
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.batches = 0
+        self.write_errors = 0
+        self.purged = 0
+        self.evicted = 0
+        self.vacuumed_pages = 0
+        self.entries = None  # as of the last maintenance run
+        self.stored_bytes = None
+
+        self._read_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-read")
+        self._write_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-write")
+        self._reader = self._connect()
+        self._writer = self._connect()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._touched = {}  # key -> [hits, last access], not yet written
+        self.purge_hooks = []  # extra async purgers run by the purge loop
         self._init_db()
 
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
     def _init_db(self):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        c = self._writer.cursor()
+        # workers starting together on one file would race to migrate it:
+        # the schema is read and changed under the write lock
+        c.execute("BEGIN IMMEDIATE")
         c.execute(
             """
             CREATE TABLE IF NOT EXISTS cache (
                 key TEXT PRIMARY KEY,
+                payload BLOB,
+                updated_at TEXT,
+                accessed_at REAL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        if c.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            columns = {row[1] for row in c.execute("PRAGMA table_info(cache)")}
+            if "accessed_at" not in columns:
+                c.execute("ALTER TABLE cache ADD COLUMN accessed_at REAL")
+            if "hits" not in columns:
+                c.execute("ALTER TABLE cache ADD COLUMN hits INTEGER NOT NULL DEFAULT 0")
+            c.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        # tables of the helpers sharing this file (SourceCache, ValidatorCache,
+        # WikiTitleMap, WorkerCoordinator): created here, before the writer
+        # thread is in use
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS source_cache (
+                source TEXT,
+                key TEXT,
                 payload TEXT,
+                updated_at TEXT,
+                PRIMARY KEY (source, key)
+            )
+            """
+        )
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS http_validators (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body TEXT,
                 updated_at TEXT
             )
             """
         )
-        conn.commit()
-        conn.close()
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS fill_leases (
+                key TEXT PRIMARY KEY,
+                owner TEXT,
+                expires_at REAL
+            )
+            """
+        )
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS wiki_titles (
+                query TEXT PRIMARY KEY,
+                page_title TEXT,
+                updated_at TEXT
+            )
+            """
+        )
+        c.execute("CREATE INDEX IF NOT EXISTS idx_cache_updated_at ON cache (updated_at)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed_at ON cache (accessed_at)")
+        self._writer.commit()
+        self.auto_vacuum = c.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    async def _run(self, pool, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, fn, *args)
+
+    # ---- reads -------------------------------------------------------
 
-    def get(self, key: str) -> Optional[dict]:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("SELECT payload, updated_at FROM cache WHERE key = ?", (key,))
-        row = c.fetchone()
-        conn.close()
+    def _select(self, key: str):
+        row = self._reader.execute(
+            "SELECT payload, updated_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            return unpack_payload(row[0]), row[1]
+        except (ValueError, zlib.error):
+            return None  # unreadable or from a newer format: a miss
+
+    def is_stale(self, updated_at: datetime, payload: Optional[dict] = None) -> bool:
+        ttl = self.ttl
+        if payload and payload.get("_ttl") is not None:
+            ttl = min(ttl, timedelta(seconds=payload["_ttl"]))
+        return datetime.utcnow() - updated_at > ttl
+
+    def touch(self, key: str):
+        """Count a hit on ``key``, for eviction (also used by the memory tier)."""
+        touched = self._touched.get(key)
+        if touched is None:
+            self._touched[key] = [1, time.time()]
+        else:
+            touched[0] += 1
+            touched[1] = time.time()
+
+    async def get_entry(self, key: str) -> Optional[tuple]:
+        """
+        Return (payload, updated_at) for an entry within the hard TTL,
+        or None. Use ``is_stale`` to check it against the soft TTL.
+        """
+        row = await self._run(self._read_pool, self._select, key)
 
         if not row:
+            self.misses += 1
             return None
 
         payload, updated_at = row
         updated_at = datetime.fromisoformat(updated_at)
 
         # expired
-        if datetime.utcnow() - updated_at > self.ttl:
+        if datetime.utcnow() - updated_at > self.hard_ttl:
+            self.misses += 1
             return None
 
-        return json.loads(payload)
+        if self.is_stale(updated_at, payload):
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        self.touch(key)
+        return payload, updated_at
 
-    def set(self, key: str, payload: dict):
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute(
-            "INSERT OR REPLACE INTO cache (key, payload, updated_at) VALUES (?, ?, ?)",
-            (key, json.dumps(payload), datetime.utcnow().isoformat()),
+    async def get(self, key: str) -> Optional[dict]:
+        entry = await self.get_entry(key)
+        if not entry or self.is_stale(entry[1], entry[0]):
+            return None
+        return entry[0]
+
+    # ---- writes ------------------------------------------------------
+
+    def _write_rows(self, rows):
+        # compressed here, on the write thread, rather than on the event loop
+        packed = [(key, pack_payload(raw), updated_at, accessed_at) for key, raw, updated_at, accessed_at in rows]
+        with self._writer:
+            # an upsert rather than INSERT OR REPLACE, so a refresh keeps the hit count
+            self._writer.executemany(
+                "INSERT INTO cache (key, payload, updated_at, accessed_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET payload = excluded.payload, "
+                "updated_at = excluded.updated_at, accessed_at = excluded.accessed_at",
+                packed,
+            )
+
+    async def set(self, key: str, payload: dict, updated_at: Optional[datetime] = None, wait: bool = False):
+        """
+        Queue a write. With ``wait``, return only once it is committed, so
+        other processes sharing the file can read it.
+        """
+        row = (key, dumps(payload), (updated_at or datetime.utcnow()).isoformat(), time.time())
+        self.writes += 1
+        if self._queue is None:
+            await self._run(self._write_pool, self._write_rows, [row])
+            return
+        done = asyncio.get_running_loop().create_future() if wait else None
+        self._queue.put_nowait((row, done))
+        if done is not None:
+            await done
+
+    async def set_many(self, items):
+        now, accessed_at = datetime.utcnow().isoformat(), time.time()
+        rows = [(key, dumps(payload), now, accessed_at) for key, payload in items]
+        self.writes += len(rows)
+        await self._run(self._write_pool, self._write_rows, rows)
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            rows = [await self._queue.get()]
+            # a waiting caller (set(wait=True)) is committed right away, with
+            # whatever else is already queued, instead of after the batch window
+            urgent = rows[0][1] is not None
+            flush_at = loop.time() + self.flush_interval
+            while len(rows) < self.batch_size:
+                if urgent:
+                    if self._queue.empty():
+                        break
+                    rows.append(self._queue.get_nowait())
+                    continue
+                timeout = flush_at - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    rows.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                urgent = rows[-1][1] is not None
+            committed = False
+            try:
+                await self._run(self._write_pool, self._write_rows, [row for row, _ in rows])
+                self.batches += 1
+                committed = True
+            except sqlite3.Error:
+                self.write_errors += 1
+            finally:
+                for _, done in rows:
+                    if done is not None and not done.done():
+                        done.set_result(committed)
+                    self._queue.task_done()
+
+    # ---- maintenance -------------------------------------------------
+
+    def _purge_sync(self, cutoff: str) -> int:
+        with self._writer:
+            cur = self._writer.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache WHERE updated_at < ? LIMIT ?)",
+                (cutoff, self.evict_batch),
+            )
+        return cur.rowcount
+
+    async def purge_expired(self) -> int:
+        cutoff = (datetime.utcnow() - self.hard_ttl).isoformat()
+        removed = 0
+        # in chunks, so queued writes get the write thread in between
+        while True:
+            n = await self._run(self._write_pool, self._purge_sync, cutoff)
+            removed += n
+            if n < self.evict_batch:
+                break
+        self.purged += removed
+        return removed
+
+    def _write_touches(self, touched: dict):
+        with self._writer:
+            self._writer.executemany(
+                "UPDATE cache SET hits = hits + ?, accessed_at = MAX(COALESCE(accessed_at, 0), ?) WHERE key = ?",
+                [(hits, at, key) for key, (hits, at) in touched.items()],
+            )
+
+    async def flush_touches(self):
+        touched, self._touched = self._touched, {}
+        if touched:
+            await self._run(self._write_pool, self._write_touches, touched)
+
+    def _usage(self) -> tuple:
+        # the bytes this table's rows store, which is what eviction frees;
+        # the other tables are bounded by their own TTLs
+        entries, stored = self._writer.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(key) + LENGTH(payload)), 0) FROM cache"
+        ).fetchone()
+        return entries, stored
+
+    def _evict_chunk(self, rows_needed: int, bytes_needed: int) -> tuple:
+        order = "hits, accessed_at" if self.eviction == "lfu" else "accessed_at"
+        candidates = self._writer.execute(
+            f"SELECT key, LENGTH(key) + LENGTH(payload) FROM cache ORDER BY {order} LIMIT ?",
+            (self.evict_batch,),
+        ).fetchall()
+        victims, freed = [], 0
+        for key, size in candidates:
+            if len(victims) >= rows_needed and freed >= bytes_needed:
+                break
+            victims.append((key,))
+            freed += size or 0
+        with self._writer:
+            self._writer.executemany("DELETE FROM cache WHERE key = ?", victims)
+        return len(victims), freed
+
+    async def enforce_limits(self) -> int:
+        """Evict entries until the cache is back under its bounds."""
+        entries, used = await self._run(self._write_pool, self._usage)
+        rows_needed = bytes_needed = 0
+        if self.max_entries and entries > self.max_entries:
+            rows_needed = entries - int(self.max_entries * EVICT_TO)
+        if self.max_bytes and used > self.max_bytes:
+            bytes_needed = used - int(self.max_bytes * EVICT_TO)
+
+        removed = 0
+        while rows_needed > 0 or bytes_needed > 0:
+            n, freed = await self._run(self._write_pool, self._evict_chunk, rows_needed, bytes_needed)
+            if not n:
+                break
+            removed += n
+            used -= freed
+            rows_needed -= n
+            bytes_needed -= freed
+        self.evicted += removed
+        self.entries, self.stored_bytes = entries - removed, used
+        return removed
+
+    def _vacuum_step(self) -> int:
+        free = self._writer.execute("PRAGMA freelist_count").fetchone()[0]
+        if free:
+            # executescript steps the pragma to completion; execute frees one page
+            self._writer.executescript(f"PRAGMA incremental_vacuum({self.vacuum_pages})")
+        return min(free, self.vacuum_pages)
+
+    def _enable_auto_vacuum(self):
+        # auto_vacuum can only be switched on by rebuilding the file
+        if self._writer.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._writer.execute("VACUUM")
+        self.auto_vacuum = self._writer.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    async def enable_auto_vacuum(self):
+        """
+        Rebuild a file created without incremental vacuum, once, so
+        ``compact`` works on it. Run by the maintenance loop rather than at
+        startup; a rebuild that finds the file busy is retried next round.
+        """
+        if not self.auto_vacuum:
+            await self._run(self._write_pool, self._enable_auto_vacuum)
+
+    async def compact(self) -> int:
+        """Return free pages to the filesystem, a few at a time."""
+        if not self.auto_vacuum:
+            return 0
+        released = 0
+        while True:
+            n = await self._run(self._write_pool, self._vacuum_step)
+            released += n
+            if n < self.vacuum_pages:
+                break
+        self.vacuumed_pages += released
+        return released
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                await self.purge_expired()
+                for hook in self.purge_hooks:
+                    await hook()
+            except sqlite3.Error:
+                pass
+            await asyncio.sleep(self.purge_interval)
+
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(self.maintenance_interval)
+            try:
+                await self.flush_touches()
+                await self.enforce_limits()
+                await self.enable_auto_vacuum()
+                await self.compact()
+            except sqlite3.Error:
+                pass
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._writer_loop()),
+            asyncio.create_task(self._purge_loop()),
+            asyncio.create_task(self._maintenance_loop()),
+        ]
+
+    async def flush(self):
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        await self.flush()
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        try:
+            await self.flush_touches()
+        except sqlite3.Error:
+            pass
+        self._read_pool.submit(self._reader.close).result()
+        self._write_pool.submit(self._writer.close).result()
+        self._read_pool.shutdown()
+        self._write_pool.shutdown()
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "batches": self.batches,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "write_errors": self.write_errors,
+            "purged": self.purged,
+            "evicted": self.evicted,
+            "vacuumed_pages": self.vacuumed_pages,
+            "entries": self.entries,
+            "stored_bytes": self.stored_bytes,
+        }
+
+
+# How long each source's trimmed response stays fresh (seconds).
+DEFAULT_SOURCE_TTLS = {
+    "wikipedia": 30 * 86400,
+    "npm": 6 * 3600,
+    "pypi": 6 * 3600,
+    "github": 6 * 3600,
+    "fallback": 7 * 86400,
+}
+
+
+class SourceCache:
+    """
+    Per-source cache of trimmed upstream responses, stored next to the
+    composed payloads in the same SQLite file and sharing SQLiteCache's
+    connections. Each source has its own TTL, so a composed answer can be
+    rebuilt by re-querying only the sources whose part has expired.
+
+    A stored value of ``None`` records a definitive miss for that source.
+    """
+
+    def __init__(self, store: SQLiteCache, ttls: Optional[dict] = None):
+        self.store = store
+        self.ttls = {**DEFAULT_SOURCE_TTLS, **(ttls or {})}
+        self.hits = {}
+        self.misses = {}
+        store.purge_hooks.append(self.purge_expired)
+
+    def _select(self, source: str, key: str):
+        return self.store._reader.execute(
+            "SELECT payload, updated_at FROM source_cache WHERE source = ? AND key = ?",
+            (source, key),
+        ).fetchone()
+
+    async def get_entry(self, source: str, key: str) -> Optional[tuple]:
+        """
+        Return (value, updated_at) for a fresh part, or None. ``value`` may
+        itself be None for a recorded miss.
+        """
+        row = await self.store._run(self.store._read_pool, self._select, source, key)
+        if row:
+            payload, updated_at = row
+            updated_at = datetime.fromisoformat(updated_at)
+            if datetime.utcnow() - updated_at <= timedelta(seconds=self.ttls[source]):
+                self.hits[source] = self.hits.get(source, 0) + 1
+                return json.loads(payload), updated_at
+
+        self.misses[source] = self.misses.get(source, 0) + 1
+        return None
+
+    def _write(self, source: str, key: str, payload: str, updated_at: str):
+        with self.store._writer:
+            self.store._writer.execute(
+                "INSERT OR REPLACE INTO source_cache (source, key, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (source, key, payload, updated_at),
+            )
+
+    async def set(self, source: str, key: str, value):
+        await self.store._run(
+            self.store._write_pool, self._write,
+            source, key, json.dumps(value), datetime.utcnow().isoformat(),
         )
-        conn.commit()
-        conn.close()
+
+    def _purge_sync(self) -> int:
+        removed = 0
+        with self.store._writer:
+            for source, ttl in self.ttls.items():
+                cutoff = (datetime.utcnow() - timedelta(seconds=ttl)).isoformat()
+                cur = self.store._writer.execute(
+                    "DELETE FROM source_cache WHERE source = ? AND updated_at < ?", (source, cutoff)
+                )
+                removed += cur.rowcount
+        return removed
+
+    async def purge_expired(self) -> int:
+        return await self.store._run(self.store._write_pool, self._purge_sync)
+
+    def stats(self) -> dict:
+        return {"hits": dict(self.hits), "misses": dict(self.misses)}
+
+
+class ValidatorCache:
+    """
+    Last good response body per URL, stored with its ETag / Last-Modified
+    so the next request can be conditional (a 304 reuses the body). Shares
+    SQLiteCache's connections. Entries have no TTL: freshness is decided by
+    the upstream through the validators.
+    """
+
+    def __init__(self, store: SQLiteCache):
+        self.store = store
+
+    def _select(self, url: str):
+        return self.store._reader.execute(
+            "SELECT etag, last_modified, body FROM http_validators WHERE url = ?", (url,)
+        ).fetchone()
+
+    async def get(self, url: str) -> Optional[dict]:
+        row = await self.store._run(self.store._read_pool, self._select, url)
+        if not row:
+            return None
+        etag, last_modified, body = row
+        return {"etag": etag, "last_modified": last_modified, "body": body}
+
+    def _write(self, url, etag, last_modified, body):
+        with self.store._writer:
+            self.store._writer.execute(
+                "INSERT OR REPLACE INTO http_validators "
+                "(url, etag, last_modified, body, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, body, datetime.utcnow().isoformat()),
+            )
+
+    async def set(self, url: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        await self.store._run(self.store._write_pool, self._write, url, etag, last_modified, body)
+
+
+class WikiTitleMap:
+    """
+    Persistent query -> Wikipedia page title map, learned from lookups
+    that resolved (including redirect targets). Later lookups for the same
+    query fetch that page directly. Shares SQLiteCache's connections.
+    """
+
+    def __init__(self, store: SQLiteCache):
+        self.store = store
+
+    @staticmethod
+    def _key(query: str) -> str:
+        return query.strip().lower()
+
+    def _select(self, query: str):
+        return self.store._reader.execute(
+            "SELECT page_title FROM wiki_titles WHERE query = ?", (query,)
+        ).fetchone()
+
+    async def get(self, query: str) -> Optional[str]:
+        row = await self.store._run(self.store._read_pool, self._select, self._key(query))
+        return row[0] if row else None
+
+    def _write(self, query, page_title):
+        with self.store._writer:
+            if page_title is None:
+                self.store._writer.execute("DELETE FROM wiki_titles WHERE query = ?", (query,))
+            else:
+                self.store._writer.execute(
+                    "INSERT OR REPLACE INTO wiki_titles (query, page_title, updated_at) VALUES (?, ?, ?)",
+                    (query, page_title, datetime.utcnow().isoformat()),
+                )
+
+    async def set(self, query: str, page_title: Optional[str]):
+        """Remember ``page_title`` for ``query`` (None forgets it)."""
+        await self.store._run(self.store._write_pool, self._write, self._key(query), page_title)
+
+
+class TieredCache:
+    """
+    In-memory LRU tier in front of SQLiteCache. Entries promoted from
+    SQLite keep whatever is left of their hard TTL, so both tiers expire a
+    key at the same moment. Entries past the soft TTL come back with
+    ``_stale: True`` so the caller can serve them and refresh in the
+    background.
+
+    With a ``prepare`` function (Formatter.prepare_cached), each memory
+    entry also keeps the pre-rendered response for its payload, built once
+    when the entry enters memory and read with ``get_prepared``.
+
+    With a ``snapshot`` (app.snapshot.Snapshot), fresh snapshot entries
+    are served before SQLite is asked, until the key is written again.
+    """
+
+    def __init__(self, store: SQLiteCache, memory: MemoryCache, prepare: Optional[Callable] = None,
+                 snapshot=None):
+        self.store = store
+        self.memory = memory
+        self.prepare = prepare
+        self.snapshot = snapshot
+        self._superseded = set()  # snapshot keys written since startup
+
+    def _remember(self, key: str, payload: dict, updated_at: datetime, ttl_seconds: float) -> tuple:
+        size = len(json.dumps(payload))
+        prepared = self.prepare(payload) if self.prepare else None
+        if prepared is not None:
+            size += len(prepared)
+        entry = (payload, updated_at, prepared)
+        self.memory.set(key, entry, ttl_seconds, size=size)
+        return entry
+
+    def _from_snapshot(self, key: str) -> Optional[tuple]:
+        if self.snapshot is None or key in self._superseded:
+            return None
+        stored = self.snapshot.get_entry(key)
+        # a stale snapshot entry may have been refreshed in SQLite since the export
+        if stored and not self.store.is_stale(stored[1], stored[0]):
+            self.store.touch(key)
+            return stored
+        return None
+
+    def _supersede(self, key: str):
+        if self.snapshot is not None and key in self.snapshot:
+            self._superseded.add(key)
+
+    async def _entry(self, key: str) -> Optional[tuple]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.store.touch(key)  # keeps keys served from memory from looking cold to eviction
+        else:
+            stored = self._from_snapshot(key) or await self.store.get_entry(key)
+            if not stored:
+                return None
+            payload, updated_at = stored
+            remaining = self.store.hard_ttl - (datetime.utcnow() - updated_at)
+            entry = self._remember(key, payload, updated_at, remaining.total_seconds())
+        return entry
+
+    def _view(self, entry: Optional[tuple]) -> Optional[dict]:
+        if entry is None:
+            return None
+        payload, updated_at, _ = entry
+        if self.store.is_stale(updated_at, payload):
+            return {**payload, "_stale": True}
+        return payload
+
+    async def get(self, key: str) -> Optional[dict]:
+        return self._view(await self._entry(key))
+
+    async def reload(self, key: str) -> Optional[dict]:
+        """Read a fresh entry straight from SQLite (e.g. one another worker just wrote)."""
+        stored = await self.store.get_entry(key)
+        if not stored or self.store.is_stale(stored[1], stored[0]):
+            return None
+        payload, updated_at = stored
+        remaining = self.store.hard_ttl - (datetime.utcnow() - updated_at)
+        self._remember(key, payload, updated_at, remaining.total_seconds())
+        return payload
+
+    def drop_if_older(self, key: str, updated_at: datetime) -> bool:
+        """Forget the memory copy of ``key`` if SQLite has a newer one."""
+        self._supersede(key)  # written by another worker since startup
+        entry = self.memory.peek(key)
+        if entry is None or entry[1] >= updated_at:
+            return False
+        self.memory.delete(key)
+        return True
+
+    async def get_prepared(self, key: str):
+        """The pre-rendered response for a fresh entry, else None."""
+        return (await self.get_with_prepared(key))[1]
+
+    async def get_with_prepared(self, key: str) -> tuple:
+        """
+        (payload as ``get`` returns it, pre-rendered response or None), from
+        one lookup: a caller that cannot use the pre-rendered response
+        keeps the payload instead of reading the tiers again.
+        """
+        entry = await self._entry(key)
+        payload = self._view(entry)
+        if payload is None or payload.get("_stale"):
+            return payload, None
+        return payload, entry[2]
+
+    async def set(self, key: str, payload: dict, wait: bool = False):
+        now = datetime.utcnow()
+        self._supersede(key)
+        # same timestamp in both tiers, so cross-worker sync can compare them
+        self._remember(key, payload, now, self.store.hard_ttl.total_seconds())
+        await self.store.set(key, payload, updated_at=now, wait=wait)
+
+    def stats(self) -> dict:
+        return {
+            "memory": self.memory.stats(),
+            "snapshot": self.snapshot.stats() if self.snapshot else None,
+            "sqlite": self.store.stats(),
+        }
@@ -0,0 +1,149 @@
+# app/coordination.py
+import asyncio
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from .cache_service import SQLiteCache
+
+
+class WorkerCoordinator:
+    """
+    Coordination between worker processes that share one SQLite cache file
+    (uvicorn/gunicorn ``--workers N``). SingleFlight only coalesces within a
+    process; this covers the gap between processes.
+
+    - Fill leases: ``run_once`` lets one worker at a time fill a key. The
+      others poll the cache until the holder's result is committed, or take
+      over if the holder dies (its lease expires) or gives up without
+      writing, e.g. on a partial result.
+    - Memory sync: ``watch`` polls the cache table, through its
+      ``updated_at`` index, for rows other workers wrote. It drops older
+      copies of those keys from this worker's memory tier, so every worker
+      serves the newest answer.
+    """
+
+    def __init__(self, store: SQLiteCache, worker_id: Optional[str] = None, lease_seconds: float = 30.0,
+                 poll_interval: float = 0.05, sync_interval: float = 1.0, sync_slack: float = 5.0):
+        self.store = store
+        self.worker_id = worker_id or f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.sync_interval = sync_interval
+        # rows are stamped before they are committed, so look back a little
+        self.sync_slack = timedelta(seconds=sync_slack)
+        self.acquired = 0
+        self.waited = 0      # answers read from another worker's fill
+        self.taken_over = 0  # waits that ended with this worker filling
+        self.invalidated = 0
+        store.purge_hooks.append(self.purge_expired)
+
+    # ---- leases ------------------------------------------------------
+
+    def _acquire(self, key: str, now: float) -> bool:
+        with self.store._writer:
+            cur = self.store._writer.execute(
+                "INSERT INTO fill_leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE fill_leases.expires_at < ?",
+                (key, self.worker_id, now + self.lease_seconds, now),
+            )
+        return cur.rowcount == 1
+
+    def _release(self, key: str):
+        with self.store._writer:
+            self.store._writer.execute(
+                "DELETE FROM fill_leases WHERE key = ? AND owner = ?", (key, self.worker_id)
+            )
+
+    async def acquire(self, key: str) -> bool:
+        # wall clock, not monotonic: expiry is compared across processes
+        return await self.store._run(self.store._write_pool, self._acquire, key, time.time())
+
+    async def release(self, key: str):
+        await self.store._run(self.store._write_pool, self._release, key)
+
+    async def run_once(self, key: str, fill: Callable[[], Awaitable], read: Callable[[], Awaitable]):
+        """
+        Return ``fill()`` if this worker gets the lease for ``key``,
+        otherwise the holder's result as seen by ``read()`` (None = not
+        there yet). ``fill`` must commit its result before returning, so
+        the waiting workers can read it. A lease can be free again because
+        its holder just filled the key, so the cache is read once more
+        before filling.
+        """
+        waiting = False
+        while True:
+            try:
+                acquired = await self.acquire(key)
+            except sqlite3.Error:
+                acquired = None  # coordination is best effort; fill without a lease
+            if acquired is not False:
+                self.acquired += acquired is True
+                try:
+                    result = await read() if acquired else None
+                    if result is not None:
+                        self.waited += 1
+                        return result
+                    self.taken_over += waiting
+                    return await fill()
+                finally:
+                    if acquired:
+                        await self.release(key)
+
+            waiting = True
+            await asyncio.sleep(self.poll_interval)
+            result = await read()
+            if result is not None:
+                self.waited += 1
+                return result
+
+    def _purge_sync(self, now: float) -> int:
+        with self.store._writer:
+            cur = self.store._writer.execute("DELETE FROM fill_leases WHERE expires_at < ?", (now,))
+        return cur.rowcount
+
+    async def purge_expired(self) -> int:
+        return await self.store._run(self.store._write_pool, self._purge_sync, time.time())
+
+    # ---- memory sync -------------------------------------------------
+
+    def _changed_since(self, since: str):
+        return self.store._reader.execute(
+            "SELECT key, updated_at FROM cache WHERE updated_at > ?", (since,)
+        ).fetchall()
+
+    async def sync_once(self, cache, since: datetime) -> int:
+        """Drop memory copies older than rows written since ``since``."""
+        rows = await self.store._run(
+            self.store._read_pool, self._changed_since, (since - self.sync_slack).isoformat()
+        )
+        dropped = 0
+        for key, updated_at in rows:
+            dropped += cache.drop_if_older(key, datetime.fromisoformat(updated_at))
+        self.invalidated += dropped
+        return dropped
+
+    async def watch(self, cache):
+        """Keep ``cache``'s memory tier in line with writes from other workers."""
+        since = datetime.utcnow()
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            now = datetime.utcnow()
+            try:
+                await self.sync_once(cache, since)
+                since = now
+            except sqlite3.Error:
+                continue
+
+    def stats(self) -> dict:
+        return {
+            "worker": self.worker_id,
+            "leases_acquired": self.acquired,
+            "served_from_other_worker": self.waited,
+            "taken_over": self.taken_over,
+            "memory_invalidations": self.invalidated,
+        }
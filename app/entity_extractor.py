@@ -0,0 +1,177 @@
+# app/entity_extractor.py
+import re
+from collections import deque
+from typing import Iterable, NamedTuple, Optional
+
+
+# Leading phrases that carry no entity information.
+QUESTION_PREFIXES = (
+    "what is", "what's", "whats", "what are", "tell me about", "explain",
+    "describe", "info on", "info about", "about",
+)
+
+# Words a query may carry around an entity without changing which entity
+# it is ("tell me about react please", "the django framework").
+FILLER_WORDS = frozenset(
+    w for prefix in QUESTION_PREFIXES for w in prefix.split()
+) | {
+    "a", "an", "the", "please", "thanks", "of", "library", "package",
+    "framework", "language", "tool", "module",
+}
+
+# Package names keep _ / and @ ("typing_extensions", "@types/node",
+# "facebook/react"), so they survive normalization.
+_STRIP = re.compile(r"[^a-z0-9.+#\-_/@ ]+")
+
+# Sentence punctuation around a query that is sent upstream as-is.
+_EDGE_PUNCTUATION = " \t\n?!.,;:'\"()[]"
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase, drop punctuation other than . + # - _ / @ and collapse
+    whitespace. Dots and slashes at the edge of a word (sentence
+    punctuation) are dropped too, so "Node.js." normalizes to "node.js".
+    """
+    words = _STRIP.sub(" ", text.lower()).split()
+    return " ".join(w.strip("./") for w in words if w.strip("./"))
+
+
+def _drop_prefix(text: str) -> str:
+    for prefix in QUESTION_PREFIXES:
+        if text.startswith(prefix + " "):
+            return text[len(prefix) + 1:]
+    return text
+
+
+class Entity(NamedTuple):
+    canonical: str               # cache key and display name
+    package: str                 # name sent to npm / PyPI
+    wiki_title: Optional[str]    # curated Wikipedia title, if known
+    matched: bool                # False when no known entity was found
+
+
+class _Automaton:
+    """Aho-Corasick automaton over normalized patterns."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]  # per node: (pattern length, value)
+
+    def add(self, pattern: str, value):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((len(pattern), value))
+
+    def build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if node else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def matches(self, text: str):
+        """Yield (start, end, value) for every pattern occurrence."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for length, value in self.out[node]:
+                yield i + 1 - length, i + 1, value
+
+
+class EntityExtractor:
+    """
+    Maps free text ("What is React JS?") to a canonical entity ("react") in
+    one pass over the text. Built once at startup from the synonym table,
+    the curated Wikipedia title map and the knowledge base records.
+
+    The longest whole-word match is used only when the rest of the query is
+    filler; "React Native" or "the next big thing" stay unmatched instead of
+    collapsing into a shorter entity they happen to contain.
+    """
+
+    def __init__(self):
+        self._automaton = _Automaton()
+        self._entities = {}
+        self._patterns = set()
+
+    @classmethod
+    def build(cls, synonyms: dict, tech_map: dict, libraries: Iterable[tuple] = ()) -> "EntityExtractor":
+        """``libraries`` yields (key, record) pairs, e.g. KnowledgeBase.records()."""
+        ex = cls()
+        for canonical, title in tech_map.items():
+            ex.add(canonical, wiki_title=title)
+        for alias, canonical in synonyms.items():
+            ex.add(canonical, aliases=[alias], wiki_title=tech_map.get(canonical))
+        for key, record in libraries:
+            record = record or {}
+            ex.add(
+                key,
+                aliases=[record.get("name", key), *record.get("aliases", [])],
+                package=record.get("package"),
+                wiki_title=record.get("wiki_title") or tech_map.get(key),
+            )
+        ex.compile()
+        return ex
+
+    def add(self, canonical: str, aliases: Iterable[str] = (), package: Optional[str] = None,
+            wiki_title: Optional[str] = None):
+        canonical = normalize(canonical)
+        known = self._entities.get(canonical)
+        entity = Entity(
+            canonical=canonical,
+            package=package or (known and known.package) or self.default_package(canonical),
+            wiki_title=wiki_title or (known and known.wiki_title) or None,
+            matched=True,
+        )
+        self._entities[canonical] = entity
+        for pattern in {canonical, *(normalize(a) for a in aliases)}:
+            if pattern and pattern not in self._patterns:
+                self._patterns.add(pattern)
+                self._automaton.add(pattern, canonical)
+
+    def compile(self):
+        self._automaton.build()
+
+    @staticmethod
+    def default_package(canonical: str) -> str:
+        # "express.js" -> "express", "tailwind css" -> "tailwindcss"
+        name = canonical[:-3] if canonical.endswith(".js") else canonical
+        return name.replace(" ", "")
+
+    def extract(self, text: str) -> Entity:
+        norm = normalize(text)
+        best = None
+        for start, end, canonical in self._automaton.matches(norm):
+            # whole words only: "react" must not match inside "preact"
+            if start > 0 and norm[start - 1] != " ":
+                continue
+            if end < len(norm) and norm[end] != " ":
+                continue
+            if best is None or (end - start, -start) > (best[1] - best[0], -best[0]):
+                best = (start, end, canonical)
+
+        # the match must be the whole query: "react native" is not "react"
+        if best and all(w in FILLER_WORDS for w in (norm[:best[0]] + " " + norm[best[1]:]).split()):
+            return self._entities[best[2]]
+
+        # normalized for the cache key only; upstreams get the query itself
+        query = _drop_prefix(norm)
+        package = _drop_prefix(" ".join(text.lower().split())).strip(_EDGE_PUNCTUATION)
+        return Entity(canonical=query, package=package or query, wiki_title=None, matched=False)
@@ -1,10 +1,11 @@
+import asyncio
 import re
-from urllib.parse import quote
 from typing import Optional
 
-WIKIPEDIA_API = "https://en.wikipedia.org/api/rest_v1/page/summary/"
-GITHUB_SEARCH_API = "https://api.github.com/search/repositories?q={}"
-USER_AGENT = {"User-Agent": "FallbackService/1.0"}
+from .entity_extractor import EntityExtractor
+from .fetch_context import FetchContext
+
+INSTALL_PATTERN = re.compile(r"(npm install.*|yarn add.*|pip install.*|composer require.*)", re.IGNORECASE)
 
 
 TECH_SYNONYMS = {
@@ -64,11 +65,22 @@ TECH_MAP = {
 
 
 class FallbackService:
-    def __init__(self, github=None, registry=None):
+    """
+    Last-resort text for a query Wikipedia has nothing on, built from the
+    async registry / GitHub / Wikipedia services.
+
+    Every upstream call goes through a FetchContext. Inside a lookup that is
+    the lookup's own context, so npm and PyPI answers it already has are
+    reused instead of fetched a second time.
+    """
+
+    def __init__(self, github=None, registry=None, extractor: Optional[EntityExtractor] = None, wiki=None):
         self.github = github
         self.registry = registry
+        self.wiki = wiki
+        self.extractor = extractor or EntityExtractor.build(TECH_SYNONYMS, TECH_MAP)
 
-    async def fetch_text(self, query: str) -> Optional[str]:
+    async def fetch_text(self, query: str, context: Optional[FetchContext] = None) -> Optional[str]:
         """
         Try multiple async fallbacks:
         1) npm registry
@@ -76,118 +88,76 @@ class FallbackService:
         3) GitHub README if query looks like 'owner/repo'
         Returns a short snippet or None if nothing found.
         """
+        context = context or FetchContext()
+        key = query.lower()
+
         # 1) npm
         if self.registry:
-            npm = await self.registry.fetch_npm_latest(query)
+            npm = await context.get(f"npm:{key}", lambda: self.registry.fetch_npm_latest(query))
             if npm and npm.get("description"):
                 return npm["description"]
 
         # 2) PyPI
         if self.registry:
-            pypi = await self.registry.fetch_pypi_info(query)
+            pypi = await context.get(f"pypi:{key}", lambda: self.registry.fetch_pypi_info(query))
             if pypi and pypi.get("info") and pypi["info"].get("summary"):
                 return pypi["info"]["summary"]
 
         # 3) GitHub README
         if self.github and "/" in query:
-            owner_repo = query.split("/")[:2]
-            owner, repo = owner_repo[0], owner_repo[1]
-            readme = await self.github.fetch_readme(owner, repo)
+            owner, repo = query.split("/")[:2]
+            readme = await context.get(f"readme:{owner}/{repo}".lower(),
+                                       lambda: self.github.fetch_readme(owner, repo))
             if readme:
                 return readme[:1024]  # limit snippet
 
         # Nothing found
         return None
 
-    def resolve_term(term: str) -> str:
-        term = term.lower().strip()
-
-        if term in TECH_SYNONYMS:
-            term = TECH_SYNONYMS[term]
-
-        if term in TECH_MAP:
-            return TECH_MAP[term]
-
-        return term
+    def resolve_term(self, term: str) -> str:
+        entity = self.extractor.extract(term)
+        return entity.wiki_title or entity.canonical
 
-    
-
-    def fetch_text_from_wikipedia(search_term: str):
-        page_title = resolve_term(search_term)
-        encoded = quote(page_title)
-        url = f"https://en.wikipedia.org/wiki/{encoded}"
+    def detect_technology_name(self, query: str) -> str:
+        entity = self.extractor.extract(query)
+        if entity.matched:
+            return entity.wiki_title or entity.canonical
+        return query
 
-        try:
-            response = requests.get(url, timeout=10)
-            if response.status_code != 200:
-                return None
-
-            soup = BeautifulSoup(response.text, "html.parser")
-
-            paragraphs = soup.select("p")
-            if not paragraphs:
-                return None
-
-            # Get the first meaningful paragraph
-            for p in paragraphs:
-                text = p.get_text().strip()
-                if len(text) > 40:
-                    return text
-        
+    async def wikipedia_summary(self, name: str, context: Optional[FetchContext] = None) -> Optional[dict]:
+        if not self.wiki:
             return None
-
-        except Exception:
+        context = context or FetchContext()
+        data = await context.get(f"wikipedia:{name.lower()}", lambda: self.wiki.fetch_summary(name, hint=name))
+        if not data:
             return None
+        return {
+            "summary": data.get("extract"),
+            "history": data.get("description"),
+            "wiki_url": data.get("content_urls", {}).get("desktop", {}).get("page")
+        }
 
-
-    def detect_technology_name(self, query: str) -> str:
-        query_lower = query.lower()
-        for key, wiki_name in TECH_MAP.items():
-            if key in query_lower:
-                return wiki_name
-        return query
-
-    def wikipedia_summary(self, name: str) -> Optional[dict]:
-        try:
-            res = requests.get(WIKIPEDIA_API + quote(name), headers=USER_AGENT, timeout=10)
-            res.raise_for_status()
-            data = res.json()
-            return {
-                "summary": data.get("extract"),
-                "history": data.get("description"),
-                "wiki_url": data.get("content_urls", {}).get("desktop", {}).get("page")
-            }
-        except requests.RequestException:
+    async def github_readme(self, name: str, context: Optional[FetchContext] = None) -> Optional[dict]:
+        if not self.github:
+            return None
+        context = context or FetchContext()
+        repo_data = await context.get(f"search:{name.lower()}", lambda: self.github.search_repository(name))
+        if not repo_data:
             return None
 
-    def github_readme(self, name: str) -> Optional[dict]:
-        try:
-            search = requests.get(GITHUB_SEARCH_API.format(name), headers=USER_AGENT, timeout=10)
-            items = search.json().get("items", [])
-            if not items:
-                return None
-
-            # Prefer exact match repo name
-            repo_data = next((r for r in items if r["name"].lower() == name.lower()), items[0])
-            owner = repo_data["owner"]["login"]
-            repo = repo_data["name"]
-            readme_url = f"https://raw.githubusercontent.com/{owner}/{repo}/master/README.md"
-            readme = requests.get(readme_url, headers=USER_AGENT, timeout=10)
-
-            if readme.status_code == 200:
-                text = readme.text
-                install_matches = re.findall(
-                    r"(npm install.*|yarn add.*|pip install.*|composer require.*)", text, re.IGNORECASE
-                )
-                installation = list(set(install_matches))[:5] if install_matches else []
-                return {
-                    "summary": text[:1000],
-                    "installation": installation,
-                    "github_url": repo_data["html_url"]
-                }
-        except:
+        owner = repo_data["owner"]["login"]
+        repo = repo_data["name"]
+        text = await context.get(f"readme:{owner}/{repo}".lower(), lambda: self.github.fetch_readme(owner, repo))
+        if not text:
             return None
 
+        install_matches = INSTALL_PATTERN.findall(text)
+        return {
+            "summary": text[:1000],
+            "installation": list(dict.fromkeys(install_matches))[:5],
+            "github_url": repo_data.get("html_url"),
+        }
+
     def detect_source(self, wiki, github):
         if wiki and github:
             return "wikipedia|github"
@@ -209,15 +179,21 @@ class FallbackService:
             "source": self.detect_source(wiki, github)
         }
 
-    def get_framework_details(self, query: str):
+    async def get_framework_details(self, query: str, context: Optional[FetchContext] = None):
         # Detect proper tech name for Wikipedia
         name = self.detect_technology_name(query)
+        own_context = context is None
+        context = context or FetchContext()
 
-        # Fetch data from Wikipedia
-        wikipedia_data = self.wikipedia_summary(name)
-
-        # Fetch data from GitHub as fallback
-        github_data = self.github_readme(name)
+        # Wikipedia and GitHub don't depend on each other
+        try:
+            wikipedia_data, github_data = await asyncio.gather(
+                self.wikipedia_summary(name, context),
+                self.github_readme(name, context),
+            )
+        finally:
+            if own_context:
+                context.close()
 
         # Build structured response
         result = self.build_structured_response(name, wikipedia_data, github_data)
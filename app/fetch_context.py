@@ -0,0 +1,41 @@
+# app/fetch_context.py
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class FetchContext:
+    """
+    Memoizes upstream calls for the lifetime of one lookup.
+
+    The first ``task(key, fn)`` for a key starts ``fn()``; later calls for
+    the same key get the same task, whether it is still running or already
+    finished. Unlike SingleFlight, results are kept until the context is
+    closed, so a step that runs after npm has answered (the fallback text)
+    reuses that answer instead of asking npm again.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Future] = {}
+        self.started = 0
+        self.reused = 0
+
+    def task(self, key: str, fn: Callable[[], Awaitable]) -> asyncio.Future:
+        t = self._tasks.get(key)
+        if t is None:
+            self.started += 1
+            t = self._tasks[key] = asyncio.ensure_future(fn())
+        else:
+            self.reused += 1
+        return t
+
+    async def get(self, key: str, fn: Callable[[], Awaitable]):
+        # shielded: one waiter giving up does not cancel the call for others
+        return await asyncio.shield(self.task(key, fn))
+
+    def close(self):
+        """Cancel whatever is still running."""
+        for t in self._tasks.values():
+            if not t.done():
+                t.cancel()
+            elif not t.cancelled():
+                t.exception()  # mark retrieved
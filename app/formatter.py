@@ -1,17 +1,69 @@
 # app/formatter.py
+import json
+import re
 from uuid import uuid4
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(obj) -> bytes:
+    """Compact JSON as UTF-8 bytes, with orjson when it is installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# A slot is a string field whose value changes per request. It is written
+# as "\x00<marker>:<name>\x00" (with a fresh random marker per template, so
+# payload text can never look like a slot) and cut out after encoding.
+def _slot(marker: str, name: str) -> str:
+    return f"\x00{marker}:{name}\x00"
+
+
+class PreparedResult:
+    """
+    A TaskResult encoded once, with gaps for the per-request values (ids
+    and timestamp). ``render`` only joins byte strings: no dict copies, no
+    text rendering and no re-encoding of the payload.
+    """
+
+    __slots__ = ("fragments", "slots")
+
+    def __init__(self, encoded: bytes, marker: str):
+        pattern = re.compile(rb'"\\u0000' + marker.encode() + rb':(\w+)\\u0000"')
+        pieces = pattern.split(encoded)
+        self.fragments = pieces[0::2]
+        self.slots = pieces[1::2]
+
+    def render(self, values: dict) -> bytes:
+        """``values`` maps slot name (bytes) to its already-encoded JSON value."""
+        out = [self.fragments[0]]
+        for slot, fragment in zip(self.slots, self.fragments[1:]):
+            out.append(values[slot])
+            out.append(fragment)
+        return b"".join(out)
+
+    def __len__(self):
+        return sum(map(len, self.fragments))
+
+
 class Formatter:
     def __init__(self):
         pass
 
-    def compose(self, query, wiki_resp, npm_resp, pypi_resp, gh_resp, fallback_text) -> dict:
+    def compose(self, query, wiki_resp, npm_resp, pypi_resp, gh_resp, fallback_text, package=None) -> dict:
         """
         Compose a single canonical payload (dictionary) that contains
-        purpose, usage, installation list, history, latest_version, summary, wiki_url
+        purpose, usage, installation list, history, latest_version, summary, wiki_url.
+        ``package`` is the registry name used in install hints (defaults to query).
         """
         name = query
+        package = package or query
         purpose = ""
         usage = ""
         installation = []
@@ -29,8 +81,8 @@ class Formatter:
         # NPM info
         if npm_resp:
             latest_version = latest_version or npm_resp.get("version")
-            installation.append(f"npm install {query}")
-            installation.append(f"yarn add {query}")
+            installation.append(f"npm install {package}")
+            installation.append(f"yarn add {package}")
             if not summary_text and npm_resp.get("description"):
                 summary_text = npm_resp.get("description")
 
@@ -38,7 +90,7 @@ class Formatter:
         if pypi_resp:
             info = pypi_resp.get("info", {})
             latest_version = latest_version or info.get("version")
-            installation.append(f"pip install {query}")
+            installation.append(f"pip install {package}")
             if not summary_text:
                 summary_text = info.get("summary")
 
@@ -63,7 +115,7 @@ class Formatter:
             "source": "wikipedia|registry|github|fallback"
         }
 
-    def build_taskresult(self, req_id, task_id, context_id, history_msgs, payload) -> dict:
+    def render_text(self, payload) -> str:
         message_text_lines = [f"📌 {payload.get('name')}"]
 
         if payload.get("purpose"):
@@ -81,9 +133,10 @@ class Formatter:
                 f"\nData source: Wikipedia ({payload.get('wiki_url')}) — content reuse may require attribution (CC BY SA)."
             )
 
-        text = "\n".join(message_text_lines)
+        return "\n".join(message_text_lines)
 
-        msg_part = {"kind": "text", "text": text}
+    def build_taskresult(self, req_id, task_id, context_id, history_msgs, payload) -> dict:
+        msg_part = {"kind": "text", "text": self.render_text(payload)}
 
         agent_msg = {
             "kind": "message",
@@ -120,3 +173,90 @@ class Formatter:
     def build_taskresult_from_cached(self, req_id, task_id, context_id, history_msgs, cached_payload) -> dict:
         payload = {**cached_payload, "_cached": True}
         return self.build_taskresult(req_id, task_id, context_id, history_msgs, payload)
+
+    def prepare_cached(self, cached_payload) -> PreparedResult:
+        """
+        Render and encode the TaskResult for a cached payload once. The
+        result is filled in per request by ``render_cached``.
+        """
+        marker = uuid4().hex
+        result = self.build_taskresult_from_cached(
+            _slot(marker, "id"), _slot(marker, "taskId"), _slot(marker, "contextId"), None, cached_payload
+        )
+        task = result["result"]
+        task["status"]["timestamp"] = _slot(marker, "timestamp")
+        task["status"]["message"]["messageId"] = _slot(marker, "messageId")
+        task["artifacts"][0]["artifactId"] = _slot(marker, "artifactId")
+        return PreparedResult(dumps(result), marker)
+
+    def render_cached(self, prepared: PreparedResult, req_id, task_id, context_id) -> bytes:
+        """Same bytes as encoding ``build_taskresult_from_cached`` for this request."""
+        return prepared.render({
+            b"id": dumps(req_id),
+            b"taskId": dumps(task_id),
+            b"contextId": dumps(context_id),
+            b"timestamp": dumps(datetime.utcnow().isoformat() + "Z"),
+            b"messageId": dumps(str(uuid4())),
+            b"artifactId": dumps(str(uuid4())),
+        })
+
+    def build_task_status(self, req_id, task_id, context_id, state, text=None) -> dict:
+        """A task with a status but no artifacts yet (working / failed)."""
+        status = {
+            "state": state,
+            "timestamp": datetime.utcnow().isoformat() + "Z"
+        }
+        if text:
+            status["message"] = {
+                "kind": "message",
+                "role": "agent",
+                "parts": [{"kind": "text", "text": text}],
+                "messageId": str(uuid4()),
+                "taskId": task_id
+            }
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "result": {
+                "id": task_id,
+                "contextId": context_id,
+                "status": status,
+                "artifacts": [],
+                "history": [],
+                "kind": "task"
+            }
+        }
+
+    def build_status_update(self, req_id, task_id, context_id, state, final=False) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "result": {
+                "kind": "status-update",
+                "taskId": task_id,
+                "contextId": context_id,
+                "status": {
+                    "state": state,
+                    "timestamp": datetime.utcnow().isoformat() + "Z"
+                },
+                "final": final
+            }
+        }
+
+    def build_artifact_update(self, req_id, task_id, context_id, name, data) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "id": req_id,
+            "result": {
+                "kind": "artifact-update",
+                "taskId": task_id,
+                "contextId": context_id,
+                "artifact": {
+                    "artifactId": str(uuid4()),
+                    "name": name,
+                    "parts": [{"kind": "data", "data": {"source": name, "response": data}}]
+                },
+                "append": False,
+                "lastChunk": True
+            }
+        }
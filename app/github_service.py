@@ -1,49 +1,192 @@
 # app/github_service.py
+import json
+import time
+import asyncio
+import urllib.parse
 import httpx
 from typing import Optional
 
+from .http_client import HTTPClientPool
+from .negative_cache import NegativeCache
+
+# READMEs are only used for short snippets and install lines near the top.
+README_MAX_BYTES = 32 * 1024
+
+
+class GitHubRateLimit:
+    """
+    Tracks GitHub's X-RateLimit-Remaining / X-RateLimit-Reset and decides
+    how to schedule the next call:
+
+    - plenty of quota: go now;
+    - below ``spread_below``: pace calls evenly over the time left until
+      reset (at most ``max_delay`` per call);
+    - at or below ``reserve``: wait for the reset if it is within
+      ``max_delay``, otherwise don't call (serve stale or nothing).
+    """
+
+    def __init__(self, reserve: int = 5, spread_below: int = 20, max_delay: float = 2.0):
+        self.reserve = reserve
+        self.spread_below = spread_below
+        self.max_delay = max_delay
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.deferred = 0
+        self.stale_served = 0
+
+    def update(self, headers):
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            self.remaining = int(remaining)
+            self.reset_at = float(reset)
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before calling, or None if the call should be skipped."""
+        if self.remaining is None or self.reset_at is None:
+            return 0.0
+        until_reset = self.reset_at - time.time()
+        if until_reset <= 0:
+            return 0.0
+        if self.remaining > self.spread_below:
+            return 0.0
+        if self.remaining > self.reserve:
+            return min(self.max_delay, until_reset / self.remaining)
+        if until_reset <= self.max_delay:
+            return until_reset
+        return None
+
+    def consume(self):
+        # assume the call counts until the response says otherwise
+        if self.remaining is not None:
+            self.remaining = max(0, self.remaining - 1)
+
+    def stats(self) -> dict:
+        return {
+            "remaining": self.remaining,
+            "reset_at": self.reset_at,
+            "deferred": self.deferred,
+            "stale_served": self.stale_served,
+        }
+
+
 class GitHubService:
-    def __init__(self, user_agent: str = "DevEncycloAgent/1.0", token: str | None = None):
+    def __init__(self, user_agent: str = "DevEncycloAgent/1.0", token: str | None = None,
+                 http: Optional[HTTPClientPool] = None, validators=None,
+                 rate_limit: Optional[GitHubRateLimit] = None, base_url: str = "https://api.github.com",
+                 negative: Optional[NegativeCache] = None):
         self.headers = {"User-Agent": user_agent}
         if token:
             self.headers["Authorization"] = f"Bearer {token}"
+        self.http = http or HTTPClientPool(user_agent=user_agent)
+        self.validators = validators  # ValidatorCache; enables conditional requests
+        self.rate_limit = rate_limit or GitHubRateLimit()
+        self.base_url = base_url.rstrip("/")
+        self.negative = negative or NegativeCache()
+        # a hedge is a second request against the hourly quota
+        self.http.set_hedging(self.base_url, False)
+
+    async def _get(self, url: str, headers: dict, max_bytes: Optional[int] = None) -> tuple:
+        """
+        Conditional, rate-limit-aware GET. Returns (status, body text);
+        a 304 comes back as (200, stored body). When the quota is nearly
+        spent, the stored body is served without a request, or (429, None)
+        if there is none.
+        """
+        stored = await self.validators.get(url) if self.validators else None
+
+        delay = self.rate_limit.delay()
+        if delay is None:
+            if stored:
+                self.rate_limit.stale_served += 1
+                return 200, stored["body"]
+            return 429, None
+        if delay:
+            self.rate_limit.deferred += 1
+            await asyncio.sleep(delay)
+
+        if stored:
+            headers = dict(headers)
+            if stored["etag"]:
+                headers["If-None-Match"] = stored["etag"]
+            if stored["last_modified"]:
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        self.rate_limit.consume()
+        r = await self.http.get(url, headers=headers, timeout=10.0, max_bytes=max_bytes)
+        self.rate_limit.update(r.headers)
+
+        if r.status_code == 304 and stored:
+            return 200, stored["body"]
+        if r.status_code == 200 and self.validators:
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+            if etag or last_modified:
+                await self.validators.set(url, etag, last_modified, r.text)
+        return r.status_code, r.text
 
     async def fetch_latest_release(self, owner: str, repo: str) -> Optional[dict]:
-        url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
-        async with httpx.AsyncClient(timeout=10.0, headers=self.headers) as client:
-            try:
-                r = await client.get(url)
-                if r.status_code == 200:
-                    return r.json()
-
-                # Fallback: repo has no releases, try tags
-                if r.status_code == 404:
-                    tags_url = f"https://api.github.com/repos/{owner}/{repo}/tags"
-                    r2 = await client.get(tags_url)
-                    if r2.status_code == 200 and r2.json():
-                        tags = r2.json()
+        """
+        Latest release, else the newest tag. None both when the repository
+        has neither (recorded, see ``is_known_missing``) and when GitHub
+        could not be asked or failed (skipped for quota, 429, 5xx, network).
+        """
+        key = f"{owner}/{repo}".lower()
+        if self.negative.is_missing("github", key):
+            return None
+        url = f"{self.base_url}/repos/{owner}/{repo}/releases/latest"
+        try:
+            status, body = await self._get(url, self.headers)
+            if status == 200:
+                return json.loads(body)
+
+            # Fallback: repo has no releases, try tags
+            if status == 404:
+                tags_url = f"{self.base_url}/repos/{owner}/{repo}/tags?per_page=1"
+                status2, body2 = await self._get(tags_url, self.headers)
+                if status2 == 200:
+                    tags = json.loads(body2)
+                    if tags:
                         return {"name": tags[0]["name"]}
+                if status2 in (200, 404):
+                    self.negative.mark_missing("github", key)
 
-            except httpx.HTTPError:
-                return None
+        except (httpx.HTTPError, ValueError):
+            return None
 
         return None
 
+    def is_known_missing(self, owner: str, repo: str) -> bool:
+        """True if the repository recently turned out to have no releases or tags."""
+        return self.negative.has("github", f"{owner}/{repo}".lower())
+
+    async def search_repository(self, name: str) -> Optional[dict]:
+        """Best repository match for ``name``: an exact name match, else the top hit."""
+        url = f"{self.base_url}/search/repositories?q={urllib.parse.quote(name)}"
+        try:
+            status, body = await self._get(url, self.headers)
+            items = json.loads(body).get("items", []) if status == 200 else []
+        except (httpx.HTTPError, ValueError):
+            return None
+        if not items:
+            return None
+        return next((r for r in items if r["name"].lower() == name.lower()), items[0])
+
     async def fetch_readme(self, owner: str, repo: str) -> Optional[str]:
-        url = f"https://api.github.com/repos/{owner}/{repo}/readme"
-        async with httpx.AsyncClient(timeout=10.0, headers=self.headers) as client:
-            try:
-                r = await client.get(
-                    url,
-                    headers={
-                        **self.headers,
-                        "Accept": "application/vnd.github.v3.raw"
-                    }
-                )
-                if r.status_code == 200:
-                    return r.text
-
-            except httpx.HTTPError:
-                return None
+        url = f"{self.base_url}/repos/{owner}/{repo}/readme"
+        try:
+            status, body = await self._get(
+                url,
+                {
+                    **self.headers,
+                    "Accept": "application/vnd.github.v3.raw"
+                },
+                max_bytes=README_MAX_BYTES,
+            )
+            if status == 200:
+                return body
+
+        except httpx.HTTPError:
+            return None
 
         return None
@@ -0,0 +1,246 @@
+# app/http_client.py
+import asyncio
+import time
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from .metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_SECONDS, status_class
+from .resilience import Resilience
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class RateLimiter:
+    """Token bucket: at most ``rate`` requests per second, bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class HTTPClientPool:
+    """
+    Long-lived, pooled httpx clients, one per upstream origin
+    (scheme + host + port). Clients are created on first use and keep
+    their connections alive between requests, so the TCP/TLS handshake to
+    each upstream is paid once instead of on every call.
+
+    With a ``Resilience`` tracker, every request also goes through that
+    host's circuit breaker, gets an adaptive timeout and, for GETs, may be
+    hedged with a duplicate request once it passes the host's p95 latency.
+
+    ``max_bytes`` / ``stop_when`` on a request stream the body and stop
+    reading early, so large upstream documents are never held in full.
+    """
+
+    def __init__(
+        self,
+        user_agent: str = "DevEncycloAgent/1.0",
+        http2: bool = True,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0,
+        resilience: Optional[Resilience] = None,
+    ):
+        self.headers = {"User-Agent": user_agent}
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.resilience = resilience
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._limiters: dict[str, RateLimiter] = {}
+        self._no_hedge: set = set()
+
+    @staticmethod
+    def _origin(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        origin = self._origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=origin,
+                headers=self.headers,
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+            )
+            self._clients[origin] = client
+        return client
+
+    def set_rate_limit(self, url: str, rate: Optional[float]):
+        """Cap requests per second to the origin of ``url`` (None removes it)."""
+        origin = self._origin(url)
+        if rate:
+            self._limiters[origin] = RateLimiter(rate)
+        else:
+            self._limiters.pop(origin, None)
+
+    def set_hedging(self, url: str, enabled: bool):
+        """
+        Allow or forbid hedged GETs to the origin of ``url``, e.g. for a
+        quota-limited API where every duplicate request costs quota.
+        """
+        origin = self._origin(url)
+        if enabled:
+            self._no_hedge.discard(origin)
+        else:
+            self._no_hedge.add(origin)
+
+    async def _send(self, method: str, url: str, max_bytes: Optional[int] = None,
+                    stop_when: Optional[Callable[[bytes], bool]] = None, **kwargs) -> httpx.Response:
+        limiter = self._limiters.get(self._origin(url))
+        if limiter:
+            await limiter.acquire()
+        if max_bytes is None and stop_when is None:
+            return await self.client_for(url).request(method, url, **kwargs)
+        return await self._read_bounded(method, url, max_bytes, stop_when, **kwargs)
+
+    async def _read_bounded(self, method, url, max_bytes, stop_when, **kwargs) -> httpx.Response:
+        """
+        Stream the body and stop after ``max_bytes`` or as soon as
+        ``stop_when(chunk)`` returns True; the rest is never downloaded.
+        The returned response holds only what was read and has
+        ``extensions["truncated"]`` set when the body was cut short.
+        """
+        chunks, size, truncated = [], 0, False
+        async with self.client_for(url).stream(method, url, **kwargs) as r:
+            async for chunk in r.aiter_bytes():
+                if max_bytes is not None and size + len(chunk) > max_bytes:
+                    chunk = chunk[:max_bytes - size]
+                    truncated = True
+                chunks.append(chunk)
+                size += len(chunk)
+                if truncated or (stop_when and r.status_code == 200 and stop_when(chunk)):
+                    truncated = True
+                    break
+        # the body is already decoded, so drop headers that describe the wire format
+        headers = [(k, v) for k, v in r.headers.items()
+                   if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(
+            r.status_code,
+            headers=headers,
+            content=b"".join(chunks),
+            request=r.request,
+            extensions={"truncated": truncated},
+        )
+
+    async def _hedged(self, delay: float, health, method: str, url: str, **kwargs) -> httpx.Response:
+        started = [asyncio.ensure_future(self._send(method, url, **kwargs))]
+        try:
+            done, _ = await asyncio.wait(started, timeout=delay)
+            if done:
+                return started[0].result()
+
+            health.hedged += 1
+            started.append(asyncio.ensure_future(self._send(method, url, **kwargs)))
+            pending, error = set(started), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if t.exception() is None:
+                        return t.result()
+                    error = t.exception()
+            raise error
+        finally:
+            # the loser, or every request if the caller gave up (a lookup deadline)
+            for t in started:
+                t.cancel()
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        host = urlsplit(url).netloc
+        UPSTREAM_IN_FLIGHT.inc(host)
+        start = time.perf_counter()
+        status = None
+        try:
+            r = await self._request(method, url, **kwargs)
+            status = r.status_code
+            return r
+        finally:
+            UPSTREAM_IN_FLIGHT.dec(host)
+            UPSTREAM_SECONDS.observe(time.perf_counter() - start, host, status_class(status))
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.resilience is None:
+            return await self._send(method, url, **kwargs)
+
+        origin = self._origin(url)
+        health = self.resilience.host(origin)
+        if not health.allow():
+            raise CircuitOpenError(f"circuit open for {origin}")
+
+        kwargs["timeout"] = health.timeout(kwargs.get("timeout") or self.timeout)
+        # a stateful stop_when can't be fed by two racing streams
+        hedge = (method == "GET" and self.resilience.hedging and kwargs.get("stop_when") is None
+                 and origin not in self._no_hedge)
+        delay = health.hedge_delay() if hedge else None
+
+        start = time.perf_counter()
+        ok = False
+        try:
+            if delay is None:
+                r = await self._send(method, url, **kwargs)
+            else:
+                r = await self._hedged(delay, health, method, url, **kwargs)
+            ok = r.status_code < 500 and r.status_code != 429
+            return r
+        finally:
+            # errors, 5xx/429 and cancellations (deadline hit) all count as failures
+            health.record(time.perf_counter() - start, ok)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def warm_up(self, urls: Iterable[str], timeout: Optional[float] = 5.0):
+        """
+        Open one connection to each upstream ahead of the first real request.
+        Failures are ignored; warm-up is best effort.
+        """
+        async def touch(url):
+            try:
+                await self.client_for(url).head(url, timeout=timeout)
+            except httpx.HTTPError:
+                pass
+
+        await asyncio.gather(*(touch(u) for u in urls))
+
+    async def aclose(self):
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
@@ -0,0 +1,99 @@
+# app/json_stream.py
+import json
+from typing import Optional
+
+_QUOTE, _BACKSLASH, _COLON, _COMMA = 0x22, 0x5C, 0x3A, 0x2C
+_OPEN = (0x7B, 0x5B)   # { [
+_CLOSE = (0x7D, 0x5D)  # } ]
+_SPACE = (0x20, 0x09, 0x0A, 0x0D)
+
+
+class JSONFieldReader:
+    """
+    Pulls one top-level field out of a JSON object while its bytes are
+    still arriving. ``feed()`` returns True once the field's value is
+    complete, so the caller can stop reading: for PyPI's package JSON,
+    ``info`` comes before the (much larger) ``releases`` map.
+
+    Only the field's own bytes are parsed. The reader does not validate
+    the parts of the document it skips over.
+    """
+
+    def __init__(self, field: str):
+        self.field = field.encode()
+        self.done = False
+        self.value = None
+        self._buf = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._after_colon = False  # depth 1: the next token is a value, not a key
+        self._key_start: Optional[int] = None
+        self._key = None
+        self._capture = False
+        self._value_start: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done:
+            return True
+        self._buf += chunk
+        buf = self._buf
+        i = self._pos
+        while i < len(buf):
+            c = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == _BACKSLASH:
+                    self._escape = True
+                elif c == _QUOTE:
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = bytes(buf[self._key_start:i])
+                        self._key_start = None
+                    elif self._capture and self._depth == 1:
+                        return self._finish(self._value_start, i + 1)
+            elif c == _QUOTE:
+                self._in_string = True
+                if self._depth == 1:
+                    if self._after_colon:
+                        self._start_value(i)
+                    else:
+                        self._key_start = i + 1
+            elif c in _OPEN:
+                if self._depth == 1:
+                    self._start_value(i)
+                self._depth += 1
+            elif c in _CLOSE:
+                self._depth -= 1
+                if self._capture and self._depth <= 1:
+                    # end of an object/array value, or of the whole document
+                    end = i + 1 if self._depth == 1 else i
+                    return self._finish(self._value_start, end)
+                if self._depth == 0:
+                    return self._finish(None, i)  # field not present
+            elif self._depth == 1:
+                if c == _COLON:
+                    self._after_colon = True
+                    self._capture = self._key == self.field
+                elif c == _COMMA:
+                    if self._capture:
+                        return self._finish(self._value_start, i)
+                    self._after_colon = False
+                elif c not in _SPACE:
+                    self._start_value(i)  # number, true, false, null
+            i += 1
+        self._pos = i
+        return False
+
+    def _start_value(self, i: int):
+        if self._capture and self._value_start is None:
+            self._value_start = i
+
+    def _finish(self, start: Optional[int], end: int) -> bool:
+        self.done = True
+        if start is not None:
+            self.value = json.loads(bytes(self._buf[start:end]))
+        self._buf = bytearray()
+        return True
@@ -0,0 +1,237 @@
+# app/knowledge_base.py
+import asyncio
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Iterator, Optional
+
+import yaml
+
+from .entity_extractor import normalize
+
+
+# Column order of a compiled record. Records are stored as tuples in this
+# order instead of dicts, which keeps large knowledge bases compact.
+FIELDS = (
+    "name", "purpose", "usage", "installation", "history",
+    "version", "summary", "package", "registry", "wiki_url", "wiki_title",
+)
+_COL = {f: i for i, f in enumerate(FIELDS)}
+
+COMPILED_FORMAT = 1
+
+
+def _compile(raw: dict):
+    """Turn {key: record} into (keys, rows, index)."""
+    keys, rows, index = [], [], {}
+    for key, record in raw.items():
+        record = record or {}
+        key = sys.intern(normalize(str(key)))
+        row = []
+        for field in FIELDS:
+            value = record.get(field)
+            if field == "version" and value is not None:
+                value = str(value)
+            if isinstance(value, str) and len(value) < 64:
+                value = sys.intern(value)
+            row.append(value)
+        pos = len(rows)
+        keys.append(key)
+        rows.append(tuple(row))
+        for alias in (key, record.get("name"), *record.get("aliases", [])):
+            if alias:
+                index.setdefault(sys.intern(normalize(str(alias))), pos)
+    return keys, rows, index
+
+
+def _load_raw(path: str) -> dict:
+    if path.endswith(".jsonl"):
+        raw = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                raw[record.get("key") or record["name"]] = record
+        return raw
+    with open(path, encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+class KnowledgeBase:
+    """
+    Curated offline records (data/libraries.yaml or a .jsonl file) compiled
+    into an indexed in-memory store. Lookups are dict hits by canonical
+    entity, name or alias and never touch the network.
+
+    The compiled form is pickled next to the source file, keyed on its
+    mtime and size, so restarts skip re-parsing large files. ``watch()``
+    reloads the store in a worker thread when the file changes.
+    """
+
+    def __init__(self, path: str, version_ttl: float = 7 * 86400):
+        self.path = path
+        self.version_ttl = version_ttl
+        self._store = ([], [], {})  # (keys, rows, index), swapped as a whole
+        self._stamp = None
+        self._overrides = {}  # key -> (version, checked_at) merged from registries
+        self.loaded_at = 0.0
+        self.reloads = 0
+        self.reload_if_changed()
+
+    # ---- loading -----------------------------------------------------
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    @property
+    def _compiled_path(self) -> str:
+        return self.path + ".kbc"
+
+    def _read_compiled(self, stamp):
+        try:
+            with open(self._compiled_path, "rb") as f:
+                fmt, saved_stamp, data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+            return None
+        if fmt != COMPILED_FORMAT or tuple(saved_stamp) != stamp:
+            return None
+        return data
+
+    def _write_compiled(self, stamp, data):
+        tmp = self._compiled_path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                pickle.dump((COMPILED_FORMAT, stamp, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._compiled_path)
+        except OSError:
+            pass  # read-only deploys just recompile on start
+
+    def reload_if_changed(self) -> bool:
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+
+        data = self._read_compiled(stamp)
+        if data is None:
+            data = _compile(_load_raw(self.path))
+            self._write_compiled(stamp, data)
+
+        # one assignment, so readers never see a half-built store
+        self._store = data
+        self._stamp = stamp
+        self._overrides = {}
+        self.loaded_at = time.time()
+        self.reloads += 1
+        return True
+
+    async def watch(self, interval: float = 5.0, on_reload=None):
+        """
+        Poll the file and reload it off the event loop when it changes,
+        then await ``on_reload()``.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                changed = await asyncio.to_thread(self.reload_if_changed)
+            except (OSError, ValueError, yaml.YAMLError):
+                continue
+            if changed and on_reload:
+                await on_reload()
+
+    # ---- reads -------------------------------------------------------
+
+    def __len__(self):
+        return len(self._store[1])
+
+    def _find(self, key: str) -> Optional[tuple]:
+        """Return (canonical key, row) or None."""
+        keys, rows, index = self._store
+        pos = index.get(normalize(key))
+        return None if pos is None else (keys[pos], rows[pos])
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def get(self, key: str) -> Optional[dict]:
+        found = self._find(key)
+        if found is None:
+            return None
+        canonical, row = found
+        record = dict(zip(FIELDS, row))
+        override = self._overrides.get(canonical)
+        if override:
+            record["version"] = override[0]
+        return record
+
+    def records(self) -> Iterator[tuple]:
+        """
+        Yield (key, record) for every entry. ``aliases`` holds the entry's
+        other (normalized) names from the index, for EntityExtractor.build.
+        """
+        keys, rows, index = self._store
+        aliases = {}
+        for alias, pos in index.items():
+            if alias != keys[pos]:
+                aliases.setdefault(pos, []).append(alias)
+        for pos, (key, row) in enumerate(zip(keys, rows)):
+            record = {f: v for f, v in zip(FIELDS, row) if v is not None}
+            if pos in aliases:
+                record["aliases"] = aliases[pos]
+            yield key, record
+
+    # ---- registry version merging -----------------------------------
+
+    def is_version_stale(self, key: str) -> bool:
+        found = self._find(key)
+        if found is None:
+            return False
+        override = self._overrides.get(found[0])
+        checked_at = override[1] if override else self.loaded_at
+        return time.time() - checked_at > self.version_ttl
+
+    def merge_version(self, key: str, version: Optional[str]):
+        """Record a registry-checked version (None keeps the curated one)."""
+        found = self._find(key)
+        if found is None:
+            return
+        canonical, row = found
+        self._overrides[canonical] = (version or row[_COL["version"]], time.time())
+
+    @staticmethod
+    def registry_of(record: dict) -> Optional[str]:
+        if record.get("registry"):
+            return record["registry"]
+        install = record.get("installation") or ""
+        if isinstance(install, list):
+            install = " ".join(install)
+        if "pip install" in install:
+            return "pypi"
+        if "npm install" in install or "yarn add" in install:
+            return "npm"
+        return None
+
+    def to_payload(self, record: dict) -> dict:
+        installation = record.get("installation") or []
+        if isinstance(installation, str):
+            installation = [installation]
+        return {
+            "name": record.get("name"),
+            "purpose": record.get("purpose") or "",
+            "usage": record.get("summary") or record.get("usage") or "No summary available.",
+            "installation": installation,
+            "history": record.get("history") or "",
+            "latest_version": record.get("version"),
+            "wiki_url": record.get("wiki_url"),
+            "source": "knowledge-base",
+        }
+
+    def stats(self) -> dict:
+        return {"entries": len(self), "reloads": self.reloads}
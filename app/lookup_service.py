@@ -0,0 +1,222 @@
+# app/lookup_service.py
+import asyncio
+from datetime import datetime
+from typing import Callable, Optional
+
+from .fetch_context import FetchContext
+from .metrics import timed
+from .util import extract_github_owner_repo_from_url
+
+
+# Per-source deadlines (seconds). Each source is also capped by what is left
+# of the overall request budget.
+DEFAULT_DEADLINES = {
+    "wikipedia": 6.0,
+    "npm": 4.0,
+    "pypi": 4.0,
+    "github": 4.0,
+    "fallback": 5.0,
+}
+
+
+def _trim_wikipedia(resp: dict) -> dict:
+    return {
+        "title": resp.get("title"),
+        "description": resp.get("description"),
+        "extract": resp.get("extract"),
+        "content_urls": {
+            "desktop": {"page": resp.get("content_urls", {}).get("desktop", {}).get("page")}
+        },
+    }
+
+
+def _trim_npm(resp: dict) -> dict:
+    return {
+        "name": resp.get("name"),
+        "version": resp.get("version"),
+        "description": resp.get("description"),
+        "homepage": resp.get("homepage"),
+    }
+
+
+def _trim_pypi(resp: dict) -> dict:
+    info = resp.get("info") or {}
+    return {
+        "info": {
+            "name": info.get("name"),
+            "version": info.get("version"),
+            "summary": info.get("summary"),
+        }
+    }
+
+
+def _trim_github(resp: dict) -> dict:
+    return {"tag_name": resp.get("tag_name"), "name": resp.get("name")}
+
+
+# Only the fields Formatter.compose reads are kept in the source cache.
+TRIMMERS = {
+    "wikipedia": _trim_wikipedia,
+    "npm": _trim_npm,
+    "pypi": _trim_pypi,
+    "github": _trim_github,
+    "fallback": lambda text: text,
+}
+
+
+class LookupService:
+    """
+    Runs the upstream lookup stage as a small dependency graph:
+
+        wikipedia ──┬── github release (needs a repo link from wikipedia)
+                    └── fallback text  (only when wikipedia has nothing)
+        npm
+        pypi
+
+    Independent sources start together; dependent steps start as soon as
+    their input resolves. A source that misses its deadline or fails
+    contributes nothing and is listed in the payload's ``_partial`` field.
+
+    With a SourceCache, each source's trimmed response is cached under its
+    own TTL and only expired sources go back to the network (unless
+    ``reuse_sources`` is off, which asks every source again and stores the
+    new parts). The payload's
+    ``_ttl`` is how long its shortest-lived part stays fresh, so the
+    composed entry goes stale no later than that part. Within one
+    lookup, the fallback step reuses the npm / PyPI answers through a
+    FetchContext instead of asking the registries again.
+    """
+
+    def __init__(self, wiki, registry, github, fallback, formatter,
+                 budget: float = 12.0, deadlines: Optional[dict] = None, sources=None):
+        self.wiki = wiki
+        self.registry = registry
+        self.github = github
+        self.fallback = fallback
+        self.formatter = formatter
+        self.budget = budget
+        self.deadlines = {**DEFAULT_DEADLINES, **(deadlines or {})}
+        self.sources = sources
+        self.reuse_sources = True
+
+    async def lookup(self, text: str, package: Optional[str] = None, wiki_title: Optional[str] = None,
+                     on_source: Optional[Callable[[str, object], None]] = None) -> dict:
+        """
+        Look ``text`` up on every source. ``package`` is the name sent to
+        npm / PyPI when it differs from the display name ("next" for
+        "next.js"); it defaults to ``text``. ``wiki_title`` is a curated
+        Wikipedia page title tried first. ``on_source(source, resp)`` is
+        called as each source resolves, with its trimmed response or None.
+        """
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + self.budget
+        failed = []
+        fresh_for = []  # seconds each consulted source's part stays fresh
+
+        async def run(source, key, fetch, is_miss=None):
+            resp = await resolve(source, key, fetch, is_miss)
+            if on_source:
+                on_source(source, resp)
+            return resp
+
+        async def resolve(source, key, fetch, is_miss):
+            if self.sources and self.reuse_sources:
+                entry = await self.sources.get_entry(source, key)
+                if entry:
+                    age = (datetime.utcnow() - entry[1]).total_seconds()
+                    fresh_for.append(self.sources.ttls[source] - age)
+                    return entry[0]
+
+            coro = fetch()
+            remaining = expires_at - loop.time()
+            timeout = min(self.deadlines[source], remaining)
+            if timeout <= 0:
+                coro.close()
+                failed.append(source)
+                return None
+            try:
+                resp = await asyncio.wait_for(coro, timeout)
+            except asyncio.TimeoutError:
+                failed.append(source)
+                return None
+
+            if resp is not None:
+                resp = TRIMMERS[source](resp)
+                if self.sources:
+                    await self.sources.set(source, key, resp)
+                    fresh_for.append(self.sources.ttls[source])
+            elif is_miss is not None:
+                if not is_miss():
+                    # an error, not a definitive miss: don't cache, don't trust
+                    failed.append(source)
+                elif self.sources:
+                    await self.sources.set(source, key, None)
+                    fresh_for.append(self.sources.ttls[source])
+            return resp
+
+        package = package or text
+        pkg = package.lower()
+        # npm / PyPI results are shared with the fallback step through here
+        context = FetchContext()
+        wiki_task = asyncio.ensure_future(run(
+            "wikipedia", text, lambda: self.wiki.fetch_summary(text, hint=wiki_title),
+            lambda: self.wiki.is_known_missing(text),
+        ))
+        npm_task = context.task(f"npm:{pkg}", lambda: run(
+            "npm", pkg, lambda: self.registry.fetch_npm_latest(package),
+            lambda: self.registry.is_known_missing("npm", package),
+        ))
+        pypi_task = context.task(f"pypi:{pkg}", lambda: run(
+            "pypi", pkg, lambda: self.registry.fetch_pypi_info(package),
+            lambda: self.registry.is_known_missing("pypi", package),
+        ))
+
+        async def github_step():
+            wiki_resp = await wiki_task
+            owner, repo = self._github_repo(wiki_resp)
+            if not owner:
+                return None
+            return await run(
+                "github", f"{owner}/{repo}".lower(),
+                lambda: self.github.fetch_latest_release(owner, repo),
+                lambda: self.github.is_known_missing(owner, repo),
+            )
+
+        async def fallback_step():
+            if await wiki_task:
+                return None
+            return await run("fallback", pkg, lambda: self.fallback.fetch_text(package, context=context))
+
+        tasks = [
+            wiki_task,
+            npm_task,
+            pypi_task,
+            asyncio.ensure_future(github_step()),
+            asyncio.ensure_future(fallback_step()),
+        ]
+        try:
+            wiki_resp, npm_resp, pypi_resp, gh_resp, fallback_text = await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+            context.close()
+
+        with timed("compose"):
+            combined = self.formatter.compose(
+                text, wiki_resp, npm_resp, pypi_resp, gh_resp, fallback_text, package=package
+            )
+        if failed:
+            combined["_partial"] = sorted(failed)
+        if fresh_for:
+            combined["_ttl"] = max(0, int(min(fresh_for)))
+        return combined
+
+    @staticmethod
+    def _github_repo(wiki_resp: Optional[dict]):
+        if not wiki_resp or not wiki_resp.get("content_urls"):
+            return None, None
+        url = wiki_resp.get("content_urls").get("desktop", {}).get("page")
+        if not url or "github.com" not in url:
+            return None, None
+        return extract_github_owner_repo_from_url(url)
@@ -1,16 +1,33 @@
 import os
+import asyncio
+import json
+from typing import Optional
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from uuid import uuid4
-from .models import JSONRPCRequest, JSONRPCResponse
+from .models import ExecuteParams, JSONRPCRequest, JSONRPCResponse, MessageParams, TaskQueryParams
 from .wikipedia_service import WikipediaService
-from .github_service import GitHubService
+from .github_service import GitHubRateLimit, GitHubService
 from .registry_service import RegistryService
-from .fallback_service import FallbackService
-from .cache_service import SQLiteCache
-from .formatter import Formatter
+from .fallback_service import FallbackService, TECH_MAP, TECH_SYNONYMS
+from .entity_extractor import Entity, EntityExtractor
+from .knowledge_base import KnowledgeBase
+from .coordination import WorkerCoordinator
+from .cache_service import SQLiteCache, SourceCache, TieredCache, ValidatorCache, WikiTitleMap
+from .snapshot import Snapshot
+from .memory_cache import MemoryCache
+from .negative_cache import NegativeCache
+from .formatter import Formatter, dumps
+from .metrics import (
+    CACHE_LOOKUPS, LOOKUPS_IN_FLIGHT, REGISTRY, STARTUP_SECONDS, MetricsMiddleware, mark_startup, timed,
+)
+from .http_client import HTTPClientPool
+from .resilience import Resilience
+from .lookup_service import LookupService
+from .singleflight import SingleFlight
+from .task_service import PushNotifier, TaskRunner, TaskStore
 from fastapi import Query
 
 
@@ -18,34 +35,322 @@ load_dotenv()
 
 PORT = int(os.getenv("PORT", 5002))
 DB_PATH = os.getenv("CACHE_DB", "./data/agent_cache.db")
+LIBRARIES_PATH = os.getenv("LIBRARIES_PATH", "./data/libraries.yaml")
+KB_VERSION_TTL = float(os.getenv("KB_VERSION_TTL", str(7 * 86400)))
+KB_WATCH_INTERVAL = float(os.getenv("KB_WATCH_INTERVAL", "5"))
 CACHE_TTL_DAYS = int(os.getenv("CACHE_TTL_DAYS", "14"))
+CACHE_HARD_TTL_DAYS = int(os.getenv("CACHE_HARD_TTL_DAYS", str(CACHE_TTL_DAYS * 2)))
+CACHE_PURGE_INTERVAL = float(os.getenv("CACHE_PURGE_INTERVAL", "3600"))
+# SQLite size bounds (0 = unbounded); CACHE_MAX_MB counts the stored keys and payloads of cached answers
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "0"))
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "0"))
+CACHE_EVICTION = os.getenv("CACHE_EVICTION", "lru")  # lru | lfu
+CACHE_MAINTENANCE_INTERVAL = float(os.getenv("CACHE_MAINTENANCE_INTERVAL", "60"))
+# Hottest entries exported with `python -m app.snapshot export`, mapped at startup
+SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT", "./data/cache_snapshot.bin")
+MEMORY_CACHE_ENTRIES = int(os.getenv("MEMORY_CACHE_ENTRIES", "1024"))
+MEMORY_CACHE_BYTES = int(os.getenv("MEMORY_CACHE_BYTES", str(32 * 1024 * 1024)))
 USER_AGENT = os.getenv("USER_AGENT", "DevEncycloAgent/1.0")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_RATE_RESERVE = int(os.getenv("GITHUB_RATE_RESERVE", "5"))
+NEGATIVE_TTLS = {
+    "wikipedia": float(os.getenv("NEGATIVE_TTL_WIKIPEDIA", str(6 * 3600))),
+    "npm": float(os.getenv("NEGATIVE_TTL_NPM", "3600")),
+    "pypi": float(os.getenv("NEGATIVE_TTL_PYPI", "3600")),
+    "github": float(os.getenv("NEGATIVE_TTL_GITHUB", "3600")),
+}
+SOURCE_TTLS = {
+    "wikipedia": float(os.getenv("SOURCE_TTL_WIKIPEDIA", str(30 * 86400))),
+    "npm": float(os.getenv("SOURCE_TTL_NPM", str(6 * 3600))),
+    "pypi": float(os.getenv("SOURCE_TTL_PYPI", str(6 * 3600))),
+    "github": float(os.getenv("SOURCE_TTL_GITHUB", str(6 * 3600))),
+    "fallback": float(os.getenv("SOURCE_TTL_FALLBACK", str(7 * 86400))),
+}
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+TASK_WORKERS = int(os.getenv("TASK_WORKERS", "4"))
+TASK_QUEUE_SIZE = int(os.getenv("TASK_QUEUE_SIZE", "100"))
+TASK_TTL = float(os.getenv("TASK_TTL", "3600"))
+PUSH_RETRIES = int(os.getenv("PUSH_RETRIES", "3"))
+LOOKUP_BUDGET = float(os.getenv("LOOKUP_BUDGET", "12"))
+HTTP2 = os.getenv("HTTP2", "1") == "1"
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_WARMUP = os.getenv("HTTP_WARMUP", "0") == "1"
+RESILIENCE = os.getenv("RESILIENCE", "1") == "1"
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "1") == "1"
+CIRCUIT_ERROR_THRESHOLD = float(os.getenv("CIRCUIT_ERROR_THRESHOLD", "0.5"))
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+# Multi-worker deployments sharing CACHE_DB: one filler per key, memory tiers kept in sync.
+# On by default only with several workers (uvicorn/gunicorn read WEB_CONCURRENCY).
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+WORKER_COORDINATION = os.getenv("WORKER_COORDINATION", "1" if WEB_CONCURRENCY > 1 else "0") == "1"
+FILL_LEASE_SECONDS = float(os.getenv("FILL_LEASE_SECONDS", str(LOOKUP_BUDGET + 5)))
+CACHE_SYNC_INTERVAL = float(os.getenv("CACHE_SYNC_INTERVAL", "1"))
+
+# Upstream base URLs; override to point the agent at mirrors or local stubs
+WIKIPEDIA_BASE_URL = os.getenv("WIKIPEDIA_BASE_URL", "https://en.wikipedia.org").rstrip("/")
+NPM_BASE_URL = os.getenv("NPM_BASE_URL", "https://registry.npmjs.org").rstrip("/")
+PYPI_BASE_URL = os.getenv("PYPI_BASE_URL", "https://pypi.org").rstrip("/")
+GITHUB_API_BASE_URL = os.getenv("GITHUB_API_BASE_URL", "https://api.github.com").rstrip("/")
+
+UPSTREAM_ORIGINS = [
+    WIKIPEDIA_BASE_URL,
+    NPM_BASE_URL,
+    PYPI_BASE_URL,
+    GITHUB_API_BASE_URL,
+]
 
 app = FastAPI(title="Developer Encyclopedia Agent", version="0.1.0")
 
 # Initialize components (will be created in lifespan)
+http = None
 wiki = None
 gh = None
 reg = None
 fallback = None
 cache = None
+sources = None
+negative = None
+kb = None
+extractor = None
 formatter = None
+lookup = None
+tasks = None
+runner = None
+notifier = None
+coordinator = None
+kb_names = None  # task compiling the knowledge base's names into the extractor
+flights = SingleFlight()
+refreshes = set()  # strong refs to background stale-while-revalidate tasks
+
+
+def ensure_upstreams():
+    """
+    Build the HTTP pool and the upstream services on first use. Cache
+    hits and knowledge-base answers never need them, so they are left
+    out of startup; a background task builds them right after.
+    """
+    global http, wiki, gh, reg, fallback, sources, lookup, notifier
+    if lookup is not None:
+        return
+    http = HTTPClientPool(
+        user_agent=USER_AGENT,
+        http2=HTTP2,
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        resilience=Resilience(
+            hedging=HEDGE_REQUESTS,
+            error_threshold=CIRCUIT_ERROR_THRESHOLD,
+            open_seconds=CIRCUIT_OPEN_SECONDS,
+        ) if RESILIENCE else None,
+    )
+    sources = SourceCache(cache.store, ttls=SOURCE_TTLS)
+    wiki = WikipediaService(
+        user_agent=USER_AGENT,
+        http=http,
+        negative=negative,
+        titles=WikiTitleMap(cache.store),
+        base_url=WIKIPEDIA_BASE_URL,
+    )
+    gh = GitHubService(
+        user_agent=USER_AGENT,
+        token=GITHUB_TOKEN,
+        http=http,
+        validators=ValidatorCache(cache.store),
+        rate_limit=GitHubRateLimit(reserve=GITHUB_RATE_RESERVE),
+        base_url=GITHUB_API_BASE_URL,
+        negative=negative,
+    )
+    reg = RegistryService(
+        user_agent=USER_AGENT,
+        http=http,
+        negative=negative,
+        npm_base_url=NPM_BASE_URL,
+        pypi_base_url=PYPI_BASE_URL,
+    )
+    fallback = FallbackService(github=gh, registry=reg, extractor=extractor, wiki=wiki)
+    notifier = PushNotifier(user_agent=USER_AGENT, retries=PUSH_RETRIES)
+    lookup = LookupService(
+        wiki, reg, gh, fallback, formatter, budget=LOOKUP_BUDGET, sources=sources
+    )
+
+
+async def prepare_upstreams():
+    await asyncio.sleep(0)  # after startup has finished
+    ensure_upstreams()
+    if HTTP_WARMUP:
+        await http.warm_up(UPSTREAM_ORIGINS)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global wiki, gh, reg, fallback, cache, formatter
-    cache = SQLiteCache(DB_PATH, ttl_days=CACHE_TTL_DAYS)
-    wiki = WikipediaService(user_agent=USER_AGENT)
-    gh = GitHubService(user_agent=USER_AGENT, token=GITHUB_TOKEN)
-    reg = RegistryService(user_agent=USER_AGENT)
-    fallback = FallbackService(github=gh, registry=reg)
+    """
+    Start only what serving a cache hit needs: the cache tiers (snapshot
+    first), the knowledge base and the extractor. Upstream services are
+    built by ``ensure_upstreams``; the knowledge base's names are compiled
+    into the extractor in a thread.
+    """
+    global http, wiki, gh, reg, fallback, cache, sources, negative, kb, extractor, formatter, lookup
+    global tasks, runner, notifier, coordinator, kb_names
+    mark_startup("imported")
     formatter = Formatter()
-    yield
+    cache = TieredCache(
+        SQLiteCache(
+            DB_PATH,
+            ttl_days=CACHE_TTL_DAYS,
+            hard_ttl_days=CACHE_HARD_TTL_DAYS,
+            purge_interval=CACHE_PURGE_INTERVAL,
+            max_entries=CACHE_MAX_ENTRIES,
+            max_bytes=int(CACHE_MAX_MB * 1024 * 1024),
+            eviction=CACHE_EVICTION,
+            maintenance_interval=CACHE_MAINTENANCE_INTERVAL,
+        ),
+        MemoryCache(max_entries=MEMORY_CACHE_ENTRIES, max_bytes=MEMORY_CACHE_BYTES),
+        prepare=formatter.prepare_cached,
+        snapshot=Snapshot.open(SNAPSHOT_PATH),
+    )
+    coordinator = WorkerCoordinator(
+        cache.store, lease_seconds=FILL_LEASE_SECONDS, sync_interval=CACHE_SYNC_INTERVAL
+    ) if WORKER_COORDINATION else None
+    await cache.store.start()
+    negative = NegativeCache(ttls=NEGATIVE_TTLS)
+    kb = KnowledgeBase(LIBRARIES_PATH, version_ttl=KB_VERSION_TTL)
+    # built-in names only until the knowledge base's are compiled in, off the loop
+    extractor = EntityExtractor.build(TECH_SYNONYMS, TECH_MAP)
+    kb_names = asyncio.create_task(rebuild_extractor())
+
+    tasks = TaskStore(ttl=TASK_TTL)
+    runner = TaskRunner(workers=TASK_WORKERS, max_queue=TASK_QUEUE_SIZE)
+    runner.start()
+
+    upstreams = asyncio.create_task(prepare_upstreams())
+    kb_watch = asyncio.create_task(kb.watch(KB_WATCH_INTERVAL, on_reload=rebuild_extractor))
+    cache_sync = asyncio.create_task(coordinator.watch(cache)) if coordinator else None
+    mark_startup("ready")
+    try:
+        yield
+    finally:
+        if not upstreams.done():
+            upstreams.cancel()
+        kb_names.cancel()
+        kb_watch.cancel()
+        if cache_sync:
+            cache_sync.cancel()
+        for t in list(refreshes):
+            t.cancel()
+        await runner.close()
+        if lookup is not None:
+            await notifier.close()
+            await http.aclose()
+        await cache.store.close()
+        if cache.snapshot:
+            cache.snapshot.close()
+        http = wiki = gh = reg = fallback = sources = lookup = notifier = None
 
 
 app.router.lifespan_context = lifespan
+app.add_middleware(MetricsMiddleware, paths=("/a2a/dev", "/health", "/stats", "/wikipedia_test"))
+
+
+async def rebuild_extractor():
+    """Compile the extractor with the current knowledge base in a thread, then swap it in."""
+    global extractor
+    extractor = await asyncio.to_thread(EntityExtractor.build, TECH_SYNONYMS, TECH_MAP, kb.records())
+    if fallback is not None:
+        fallback.extractor = extractor
+
+
+async def fetch_registry_version(record: dict, key: str):
+    registry = kb.registry_of(record)
+    package = record.get("package") or key
+    ensure_upstreams()
+    try:
+        if registry == "npm":
+            resp = await asyncio.wait_for(reg.fetch_npm_latest(package), 4.0)
+            return resp.get("version") if resp else None
+        if registry == "pypi":
+            resp = await asyncio.wait_for(reg.fetch_pypi_info(package), 4.0)
+            return (resp.get("info") or {}).get("version") if resp else None
+    except asyncio.TimeoutError:
+        return None
+    return None
+
+
+async def answer_from_kb(key: str) -> dict:
+    """
+    Build a payload from the curated knowledge base. When the record's
+    version has not been checked for KB_VERSION_TTL seconds, the registry
+    is asked in the background; this answer keeps the version on hand.
+    """
+    if kb.is_version_stale(key) and f"kb:{key}" not in flights:
+        async def check():
+            record = kb.get(key)
+            kb.merge_version(key, await fetch_registry_version(record, key))
+
+        run_in_background(flights.do(f"kb:{key}", check))
+    return kb.to_payload(kb.get(key))
+
+
+def resolve_entity(text: str) -> Entity:
+    """
+    Canonical entity for free text: "React JS", "reactjs" and
+    "what is react?" share one cache key and one upstream name.
+    """
+    entity = extractor.extract(text)
+    if not entity.canonical:
+        entity = Entity(canonical=text.lower(), package=text, wiki_title=None, matched=False)
+    return entity
+
+
+async def fetch_and_cache(key: str, entity: Entity, on_source=None) -> dict:
+    """
+    Run the upstream fan-out for one entity and cache the result.
+    Identical in-flight calls share one fan-out and one cache write;
+    ``on_source`` only sees per-source events if this call leads the flight.
+    With several workers, only the one holding the key's fill lease runs
+    the fan-out; the others pick its answer up from SQLite.
+    """
+    async def fill():
+        ensure_upstreams()
+        combined = await lookup.lookup(
+            entity.canonical, package=entity.package, wiki_title=entity.wiki_title, on_source=on_source
+        )
+        # partial results are served but not cached
+        if not combined.get("_partial"):
+            # committed before the lease is released, so waiting workers can read it
+            await cache.set(key, combined, wait=coordinator is not None)
+        return combined
+
+    async def coordinated():
+        if coordinator is None:
+            return await fill()
+        return await coordinator.run_once(key, fill, read=lambda: cache.reload(key))
+
+    return await flights.do(key, coordinated)
+
+
+def schedule_refresh(key: str, entity: Entity):
+    """Refresh a stale entry in the background, at most once per key."""
+    if key in flights:
+        return
+    run_in_background(fetch_and_cache(key, entity))
+
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    refreshes.add(task)
+    task.add_done_callback(_refresh_done)
+
+
+def _refresh_done(task: asyncio.Task):
+    refreshes.discard(task)
+    # a failed refresh just leaves the stale entry in place
+    if not task.cancelled():
+        task.exception()
+
 
 @app.get("/")
 def root():
@@ -53,128 +358,357 @@ def root():
 
 
 
-@app.post("/a2a/dev")
-async def a2a_dev(request: Request):
-    try:
-        body = await request.json()
+def rpc_error(req_id, code: int, message: str, status_code: int = 400, data=None):
+    error = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return status_code, {"jsonrpc": "2.0", "id": req_id, "error": error}
+
+
+async def shared_lookup(key: str, entity: Entity, lookups: Optional[dict]) -> dict:
+    """
+    Fetch one entity. Within a batch (``lookups`` is the per-batch table)
+    duplicate queries share one lookup even when they do not overlap in time.
+    """
+    if lookups is None:
+        return await fetch_and_cache(key, entity)
+    task = lookups.get(key)
+    if task is None:
+        task = lookups[key] = asyncio.ensure_future(fetch_and_cache(key, entity))
+    return await asyncio.shield(task)
+
+
+_PARAMS = {
+    "message/send": MessageParams,
+    "message/stream": MessageParams,
+    "execute": ExecuteParams,
+    "tasks/get": TaskQueryParams,
+}
 
-        if body.get("jsonrpc") != "2.0" or "id" not in body:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": body.get("id"),
-                    "error": {"code": -32600, "message": "Invalid Request"},
-                },
-            )
-
-        rpc = JSONRPCRequest(**body)
-
-        # Extract messages
-        if rpc.method == "message/send":
-            messages = [rpc.params.message]
-            config = rpc.params.configuration
-        elif rpc.method == "execute":
-            messages = rpc.params.messages
-            config = None
+
+def parse_rpc(body):
+    """
+    Validate one JSON-RPC request object and pull out the user's query.
+    Returns (rpc, messages, text, None) or (None, None, None, (status_code, content)).
+    """
+    if not isinstance(body, dict) or body.get("jsonrpc") != "2.0" or "id" not in body:
+        req_id = body.get("id") if isinstance(body, dict) else None
+        return None, None, None, rpc_error(req_id, -32600, "Invalid Request")
+
+    rpc = JSONRPCRequest(**body)
+    # params validate against any member of the union; it must be the method's own
+    if not isinstance(rpc.params, _PARAMS[rpc.method]):
+        return None, None, None, rpc_error(rpc.id, -32602, "Invalid params")
+    if rpc.method == "tasks/get":
+        return rpc, None, None, None
+
+    # Extract messages
+    if rpc.method in ("message/send", "message/stream"):
+        messages = [rpc.params.message]
+    elif rpc.method == "execute":
+        messages = rpc.params.messages
+    else:
+        return None, None, None, rpc_error(rpc.id, -32601, "Method not found")
+
+    # Get user query (last message text)
+    user_msg = messages[-1] if messages else None
+    if not user_msg:
+        return None, None, None, rpc_error(rpc.id, -32602, "No message provided")
+
+    text = ""
+    for part in user_msg.parts:
+        if part.kind == "text" and part.text:
+            text = part.text.strip()
+            break
+
+    if not text:
+        return None, None, None, rpc_error(rpc.id, -32602, "Empty text")
+
+    return rpc, messages, text, None
+
+
+def task_ids(rpc, messages):
+    task_id = getattr(rpc.params, "taskId", None) or messages[-1].taskId or str(uuid4())
+    return task_id, str(uuid4())
+
+
+async def answer(req_id, messages, text, task_id, context_id, lookups: Optional[dict] = None,
+                 preloaded: Optional[dict] = None) -> dict:
+    """
+    Answer one query and return the completed TaskResult. ``preloaded``
+    maps a key to what the cache already returned for it in this request
+    (None for a miss), so the cache is not read again.
+    """
+    entity = resolve_entity(text)
+    key = entity.canonical
+
+    # 1) Curated knowledge base (no network unless its version is stale)
+    if key in kb:
+        CACHE_LOOKUPS.inc("kb")
+        with timed("kb"):
+            combined = await answer_from_kb(key)
+        with timed("render"):
+            return formatter.build_taskresult(req_id, task_id, context_id, messages, combined)
+
+    # 2) Check cache (stale entries are served while a refresh runs)
+    if preloaded is not None and key in preloaded:
+        cached = preloaded[key]
+    else:
+        with timed("cache"):
+            cached = await cache.get(key)
+    if cached:
+        if cached.get("_stale"):
+            CACHE_LOOKUPS.inc("stale")
+            schedule_refresh(key, entity)
         else:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": rpc.id,
-                    "error": {"code": -32601, "message": "Method not found"},
-                },
-            )
-
-        # Get user query (last message text)
-        user_msg = messages[-1] if messages else None
-        if not user_msg:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": rpc.id,
-                    "error": {"code": -32602, "message": "No message provided"},
-                },
-            )
-
-        text = ""
-        for part in user_msg.parts:
-            if part.kind == "text" and part.text:
-                text = part.text.strip()
-                break
-
-        if not text:
-            return JSONResponse(
-                status_code=400,
-                content={
-                    "jsonrpc": "2.0",
-                    "id": rpc.id,
-                    "error": {"code": -32602, "message": "Empty text"},
-                },
-            )
-
-        key = text.lower()
-
-        # 1) Check cache
-        cached = cache.get(key)
-        if cached:
-            task_id = rpc.params.message.taskId or str(uuid4())
-            context_id = str(uuid4())
-            response = formatter.build_taskresult_from_cached(
-                rpc.id, task_id, context_id, messages, cached
-            )
-            return response
-
-        # 2) Try Wikipedia
-        wiki_resp = await wiki.fetch_summary(text)
-
-        # 3) Try registries & GitHub
-        npm_resp = await reg.fetch_npm_latest(text)
-        pypi_resp = await reg.fetch_pypi_info(text)
-
-        gh_resp = None
-        if wiki_resp and wiki_resp.get("content_urls"):
-            # attempt to extract github link from wiki URL fields
-            url = wiki_resp.get("content_urls").get("desktop", {}).get("page")
-            if url and "github.com" in url:
-                import re
-
-                m = re.search(r"github\.com/([^/]+)/([^/]+)/?", url)
-                if m:
-                    owner, repo = m.groups()
-                    gh_resp = await gh.fetch_latest_release(owner, repo)
-
-        # 4) Fallback: GitHub README or registry descriptions
-        fallback_text = None
-        if not wiki_resp:
-            fallback_text = await fallback.fetch_text(text)
-
-        # 5) Build combined result
-        combined = formatter.compose(
-            text, wiki_resp, npm_resp, pypi_resp, gh_resp, fallback_text
-        )
+            CACHE_LOOKUPS.inc("hit")
+        with timed("render"):
+            return formatter.build_taskresult_from_cached(req_id, task_id, context_id, messages, cached)
 
-        # 6) Cache and respond
-        cache.set(key, combined)
+    # 3) Fan out to Wikipedia, registries, GitHub and fallback concurrently
+    CACHE_LOOKUPS.inc("miss")
+    with timed("lookup"):
+        combined = await shared_lookup(key, entity, lookups)
 
-        task_id = rpc.params.message.taskId or str(uuid4())
-        context_id = str(uuid4())
-        response = formatter.build_taskresult(
-            rpc.id, task_id, context_id, messages, combined
-        )
-        return response
+    # 4) Respond
+    with timed("render"):
+        return formatter.build_taskresult(req_id, task_id, context_id, messages, combined)
+
+
+def submit_task(rpc, messages, text, task_id, context_id, config):
+    """
+    Non-blocking message/send: store a ``working`` task, run the lookup on
+    the background worker pool and return the working task right away.
+    Clients poll with tasks/get or receive the result by push notification.
+    """
+    working = formatter.build_task_status(rpc.id, task_id, context_id, "working")
+
+    async def job():
+        try:
+            task = (await answer(rpc.id, messages, text, task_id, context_id))["result"]
+        except Exception as e:
+            task = formatter.build_task_status(rpc.id, task_id, context_id, "failed", str(e))["result"]
+        tasks.put(task)
+        if config.pushNotificationConfig:
+            ensure_upstreams()
+            notifier.send(config.pushNotificationConfig, task)
+
+    try:
+        runner.submit(job)
+    except asyncio.QueueFull:
+        return rpc_error(rpc.id, -32000, "Server busy, try again later", status_code=503)
+    tasks.put(working["result"])
+    return 200, working
+
+
+async def handle_rpc(body, lookups: Optional[dict] = None, preloaded: Optional[dict] = None):
+    """
+    Handle one JSON-RPC request object. Returns (status_code, content).
+    ``preloaded`` is passed on to ``answer``.
+    """
+    try:
+        rpc, messages, text, error = parse_rpc(body)
+        if error:
+            return error
+        if rpc.method == "message/stream":
+            return rpc_error(rpc.id, -32600, "message/stream cannot be used in a batch")
+
+        if rpc.method == "tasks/get":
+            task = tasks.get(rpc.params.id)
+            if task is None:
+                return rpc_error(rpc.id, -32001, "Task not found")
+            return 200, {"jsonrpc": "2.0", "id": rpc.id, "result": task}
+
+        task_id, context_id = task_ids(rpc, messages)
+
+        config = getattr(rpc.params, "configuration", None)
+        if config and not config.blocking:
+            return submit_task(rpc, messages, text, task_id, context_id, config)
+
+        return 200, await answer(rpc.id, messages, text, task_id, context_id, lookups, preloaded)
 
     except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={
-                "jsonrpc": "2.0",
-                "id": body.get("id") if "body" in locals() else None,
-                "error": {"code": -32603, "message": "Internal error", "data": str(e)},
-            },
-        )
+        return rpc_error(body.get("id"), -32603, "Internal error", status_code=500, data=str(e))
+
+
+def sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+async def stream_rpc(rpc, messages, text):
+    """
+    Server-Sent Events for message/stream: a ``working`` status first, one
+    artifact update per source as it resolves, then the completed task.
+    """
+    entity = resolve_entity(text)
+    key = entity.canonical
+    task_id, context_id = task_ids(rpc, messages)
+    yield sse(formatter.build_status_update(rpc.id, task_id, context_id, "working"))
+
+    lookup_task = None
+    try:
+        if key in kb:
+            combined = await answer_from_kb(key)
+            yield sse(formatter.build_artifact_update(rpc.id, task_id, context_id, "knowledge-base", combined))
+        else:
+            cached = await cache.get(key)
+            if cached:
+                if cached.get("_stale"):
+                    schedule_refresh(key, entity)
+                combined = {**cached, "_cached": True}
+                yield sse(formatter.build_artifact_update(rpc.id, task_id, context_id, "cache", cached))
+            else:
+                events = asyncio.Queue()
+                lookup_task = asyncio.ensure_future(fetch_and_cache(
+                    key, entity, on_source=lambda source, resp: events.put_nowait((source, resp))
+                ))
+                while not (lookup_task.done() and events.empty()):
+                    getter = asyncio.ensure_future(events.get())
+                    await asyncio.wait({getter, lookup_task}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    source, resp = getter.result()
+                    yield sse(formatter.build_artifact_update(rpc.id, task_id, context_id, source, resp))
+                combined = lookup_task.result()
+
+        yield sse(formatter.build_taskresult(rpc.id, task_id, context_id, messages, combined))
+
+    except Exception as e:
+        _, content = rpc_error(rpc.id, -32603, "Internal error", status_code=500, data=str(e))
+        yield sse(content)
+    finally:
+        # client went away: stop waiting (a shared lookup keeps running for others)
+        if lookup_task and not lookup_task.done():
+            lookup_task.cancel()
+
+
+_ROLES = ("user", "agent", "system")
+_PART_KINDS = ("text", "data", "file")
+
+
+def quick_parse(body):
+    """
+    Cheap check for the common case: a blocking message/send whose shape
+    the Pydantic models would accept as-is. Returns (id, text, taskId) or
+    None, in which case the request takes the full parse_rpc path.
+    """
+    if not isinstance(body, dict) or body.get("jsonrpc") != "2.0" or body.get("method") != "message/send":
+        return None
+    req_id, params = body.get("id"), body.get("params")
+    if not isinstance(req_id, str) or not isinstance(params, dict):
+        return None
+
+    config = params.get("configuration")
+    if config is not None:
+        if not isinstance(config, dict) or config.get("blocking", True) is not True \
+                or config.get("pushNotificationConfig") is not None or "acceptedOutputModes" in config:
+            return None
+
+    msg = params.get("message")
+    if not isinstance(msg, dict) or msg.get("kind", "message") != "message" or msg.get("role") not in _ROLES:
+        return None
+    task_id = msg.get("taskId")
+    if task_id is not None and not isinstance(task_id, str):
+        return None
+    if not isinstance(msg.get("messageId", ""), str):
+        return None
+    parts = msg.get("parts")
+    if not isinstance(parts, list):
+        return None
+
+    text = ""
+    for part in parts:
+        if not isinstance(part, dict) or part.get("kind") not in _PART_KINDS:
+            return None
+        value = part.get("text")
+        if value is not None and not isinstance(value, str):
+            return None
+        if part.get("data") is not None or part.get("file_url") is not None:
+            return None  # leave anything unusual to Pydantic
+        if not text and part["kind"] == "text" and value:
+            text = value.strip()
+    if not text:
+        return None
+    return req_id, text, task_id
+
+
+async def answer_prepared(req_id, text: str, task_id: Optional[str]) -> tuple:
+    """
+    Cache-hit fast path: splice the request's ids into the pre-rendered
+    response. Returns (response bytes, None) on a fresh hit. Otherwise
+    (None, preloaded): the caller falls back to ``answer``, passing on
+    ``preloaded`` ({key: payload or None}) so the cache is not read twice;
+    it is None for knowledge-base keys, which never reach the cache.
+    """
+    key = resolve_entity(text).canonical
+    if key in kb:
+        return None, None
+    with timed("cache"):
+        payload, prepared = await cache.get_with_prepared(key)
+    if prepared is None:
+        return None, {key: payload}
+    CACHE_LOOKUPS.inc("hit")
+    with timed("render"):
+        return formatter.render_cached(prepared, req_id, task_id or str(uuid4()), str(uuid4())), None
+
+
+async def handle_batch(items: list) -> list:
+    """
+    Run a JSON-RPC batch: every item is validated and answered on its own,
+    at most BATCH_CONCURRENCY at a time, and duplicate queries share one
+    lookup.
+    """
+    sem = asyncio.Semaphore(BATCH_CONCURRENCY)
+    lookups = {}
+
+    async def one(item):
+        async with sem:
+            _, content = await handle_rpc(item, lookups)
+            return content
+
+    return list(await asyncio.gather(*(one(item) for item in items)))
+
+
+def json_response(content, status_code: int = 200) -> Response:
+    """Encode with the fast encoder, timed as its own stage."""
+    with timed("encode"):
+        body = dumps(content)
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+
+@app.post("/a2a/dev")
+async def a2a_dev(request: Request):
+    try:
+        body = await request.json()
+    except ValueError:
+        status, content = rpc_error(None, -32700, "Parse error")
+        return json_response(content, status)
+
+    if isinstance(body, list):
+        if not body or len(body) > BATCH_MAX_ITEMS:
+            status, content = rpc_error(None, -32600, "Invalid Request")
+            return json_response(content, status)
+        return json_response(await handle_batch(body))
+
+    if isinstance(body, dict) and body.get("method") == "message/stream":
+        try:
+            rpc, messages, text, error = parse_rpc(body)
+        except Exception as e:
+            error = rpc_error(body.get("id"), -32603, "Internal error", status_code=500, data=str(e))
+        if error:
+            return json_response(error[1], error[0])
+        return StreamingResponse(stream_rpc(rpc, messages, text), media_type="text/event-stream")
+
+    fast = quick_parse(body)
+    preloaded = None
+    if fast:
+        raw, preloaded = await answer_prepared(*fast)
+        if raw is not None:
+            return Response(content=raw, media_type="application/json")
+
+    status, content = await handle_rpc(body, preloaded=preloaded)
+    return json_response(content, status)
 
 @app.get("/wikipedia_test")
 async def wikipedia_test(title: str = Query(..., description="The topic to fetch from Wikipedia")):
@@ -182,8 +716,9 @@ async def wikipedia_test(title: str = Query(..., description="The topic to fetch
     Test endpoint: fetch summary from Wikipedia for a given title.
     Example: /wikipedia_test?title=Python_(programming_language)
     """
-    if not wiki:
+    if not cache:
         return {"error": "Wikipedia service not initialized"}
+    ensure_upstreams()
 
     result = await wiki.fetch_summary(title)
     if not result:
@@ -202,6 +737,31 @@ async def health():
     return {"status": "healthy", "agent": "dev-encyclo"}
 
 
+@app.get("/stats")
+async def stats():
+    return {
+        "cache": cache.stats() if cache else None,
+        "knowledge_base": kb.stats() if kb else None,
+        "source_cache": sources.stats() if sources else None,
+        "negative_cache": negative.stats() if negative else None,
+        "upstreams": http.resilience.stats() if http and http.resilience else None,
+        "github_rate_limit": gh.rate_limit.stats() if gh else None,
+        "singleflight": flights.stats(),
+        "startup_seconds": {phase: STARTUP_SECONDS.value(phase)
+                            for phase in ("imported", "ready", "first_response")},
+        "workers": coordinator.stats() if coordinator else None,
+        "tasks": runner.stats() if runner else None,
+        "push": notifier.stats() if notifier else None,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of request, stage, upstream and cache metrics."""
+    LOOKUPS_IN_FLIGHT.set(flights.stats()["in_flight"])
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     import uvicorn
 
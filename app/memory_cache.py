@@ -0,0 +1,88 @@
+# app/memory_cache.py
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class MemoryCache:
+    """
+    Bounded in-process LRU with per-entry expiry.
+
+    Bounded by entry count and, optionally, by the approximate size of the
+    entries (their JSON length in bytes). Expiry is tracked on the monotonic
+    clock; callers pass the remaining lifetime so it lines up with the
+    persistent tier's TTL.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 disables the byte bound
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at, size = entry
+        if time.monotonic() >= expires_at:
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def set(self, key: str, payload: Any, ttl_seconds: float, size: Optional[int] = None):
+        if ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        if size is None:
+            size = len(json.dumps(payload))
+        if self.max_bytes and size > self.max_bytes:
+            return
+
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (payload, time.monotonic() + ttl_seconds, size)
+        self.bytes += size
+
+        while len(self._data) > self.max_entries or (self.max_bytes and self.bytes > self.max_bytes):
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def peek(self, key: str) -> Optional[Any]:
+        """The stored value, without touching LRU order, expiry or hit counts."""
+        entry = self._data.get(key)
+        return entry[0] if entry else None
+
+    def delete(self, key: str):
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def _remove(self, key: str):
+        _, _, size = self._data.pop(key)
+        self.bytes -= size
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,272 @@
+# app/metrics.py
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+# Latency buckets (seconds), from sub-millisecond cache hits to slow upstreams.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, object] = {}
+
+    @property
+    def family(self) -> str:
+        """Name used in the HELP and TYPE lines."""
+        return self.name
+
+    def _header(self) -> list:
+        return [f"# HELP {self.family} {self.doc}", f"# TYPE {self.family} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    @property
+    def family(self) -> str:
+        # as prometheus_client: the samples and their metadata share the _total name
+        return f"{self.name}_total"
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.family}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; ``observe`` is one bisect and three adds."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labels: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        series = self._values.get(labels)
+        if series is None:
+            # per-bucket counts (last slot is +Inf), sum, count
+            series = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._values.get(labels)
+        return series[2] if series else 0
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, doc: str, labels=()) -> Counter:
+        return self._add(Counter(name, doc, labels))
+
+    def gauge(self, name: str, doc: str, labels=()) -> Gauge:
+        return self._add(Gauge(name, doc, labels))
+
+    def histogram(self, name: str, doc: str, labels=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, doc, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "agent_request_duration_seconds", "Time to answer an HTTP request.", ("path", "status_class"))
+STAGE_SECONDS = REGISTRY.histogram(
+    "agent_stage_duration_seconds", "Time spent in each stage of a request.", ("stage",))
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "agent_upstream_request_duration_seconds", "Upstream HTTP call latency.", ("host", "status_class"))
+CACHE_LOOKUPS = REGISTRY.counter(
+    "agent_cache_lookups", "Answer cache lookups by result.", ("result",))
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "agent_requests_in_flight", "HTTP requests being handled.", ("path",))
+UPSTREAM_IN_FLIGHT = REGISTRY.gauge(
+    "agent_upstream_requests_in_flight", "Upstream HTTP calls in progress.", ("host",))
+LOOKUPS_IN_FLIGHT = REGISTRY.gauge(
+    "agent_lookups_in_flight", "Upstream fan-outs in progress (after single-flight coalescing).")
+STARTUP_SECONDS = REGISTRY.gauge(
+    "agent_startup_seconds", "Seconds from process start to each startup milestone.", ("phase",))
+
+_IMPORTED_AT = time.monotonic()
+
+
+def process_uptime() -> float:
+    """
+    Seconds since this process started. Read from /proc on Linux (10 ms
+    resolution); elsewhere counted from when this module was imported.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # fields after the command name, which may contain spaces
+            started = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return time.monotonic() - _IMPORTED_AT
+
+
+def mark_startup(phase: str):
+    """Record a startup milestone once (later calls for ``phase`` are ignored)."""
+    if not STARTUP_SECONDS.value(phase):
+        STARTUP_SECONDS.set(process_uptime(), phase)
+
+
+def status_class(status: Optional[int]) -> str:
+    return f"{status // 100}xx" if status else "error"
+
+
+# ---- per-request stage timing ------------------------------------------
+
+class RequestTiming:
+    """Stage durations of one request, for the Server-Timing header."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def header(self, total: Optional[float] = None) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        if total is not None:
+            parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("current_timing", default=None)
+
+
+@contextmanager
+def timed(stage: str):
+    """Record how long the block took, in the histogram and the current request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage)
+        timing = current_timing.get()
+        if timing is not None:
+            timing.add(stage, elapsed)
+
+
+class MetricsMiddleware:
+    """
+    Plain ASGI middleware: times each HTTP request, tracks in-flight
+    requests and adds a ``Server-Timing`` header with the stages recorded
+    through ``timed()`` while the response was being produced, and the
+    time to the process's first response. Paths not
+    listed in ``paths`` share the label "other", so stray URLs can't blow
+    up the number of series.
+    """
+
+    def __init__(self, app, paths=(), skip_paths=("/metrics",)):
+        self.app = app
+        self.paths = set(paths)
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"] if scope["path"] in self.paths else "other"
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                mark_startup("first_response")
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.header(time.perf_counter() - start).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc(path)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec(path)
+            REQUEST_SECONDS.observe(time.perf_counter() - start, path, status_class(status))
+            current_timing.reset(token)
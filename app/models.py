@@ -47,11 +47,16 @@ class ExecuteParams(BaseModel):
     messages: List[A2AMessage]
 
 
+class TaskQueryParams(BaseModel):
+    id: str
+    historyLength: Optional[int] = None
+
+
 class JSONRPCRequest(BaseModel):
     jsonrpc: Literal["2.0"]
     id: str
-    method: Literal["message/send", "execute"]
-    params: MessageParams | ExecuteParams
+    method: Literal["message/send", "message/stream", "execute", "tasks/get"]
+    params: MessageParams | ExecuteParams | TaskQueryParams
 
 
 class TaskStatus(BaseModel):
@@ -0,0 +1,66 @@
+# app/negative_cache.py
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+# How long a definitive "not found" is remembered, per source (seconds).
+DEFAULT_TTLS = {
+    "wikipedia": 6 * 3600,
+    "npm": 3600,
+    "pypi": 3600,
+    "github": 3600,
+}
+
+
+class NegativeCache:
+    """
+    Remembers definitive upstream misses (HTTP 404) per source so repeated
+    queries skip endpoints known to have nothing. Only 404s belong here;
+    timeouts and 5xx responses say nothing about whether the resource
+    exists and must not be recorded.
+    """
+
+    def __init__(self, ttls: Optional[dict] = None, default_ttl: float = 3600, max_entries: int = 10000):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._data: "OrderedDict[tuple, float]" = OrderedDict()
+        self.recorded = {}
+        self.skipped = {}
+
+    def has(self, source: str, key: str) -> bool:
+        k = (source, key)
+        expires_at = self._data.get(k)
+        if expires_at is None:
+            return False
+        if time.monotonic() >= expires_at:
+            del self._data[k]
+            return False
+        return True
+
+    def is_missing(self, source: str, key: str) -> bool:
+        """Like ``has``, but counts the hit as a skipped upstream call."""
+        if not self.has(source, key):
+            return False
+        self.skipped[source] = self.skipped.get(source, 0) + 1
+        return True
+
+    def mark_missing(self, source: str, key: str):
+        k = (source, key)
+        ttl = self.ttls.get(source, self.default_ttl)
+        self._data.pop(k, None)
+        self._data[k] = time.monotonic() + ttl
+        self.recorded[source] = self.recorded.get(source, 0) + 1
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def forget(self, source: str, key: str):
+        self._data.pop((source, key), None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._data),
+            "recorded": dict(self.recorded),
+            "skipped": dict(self.skipped),
+        }
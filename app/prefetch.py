@@ -0,0 +1,138 @@
+# app/prefetch.py
+"""
+Warm the cache ahead of traffic.
+
+    python -m app.prefetch names.txt --concurrency 8 --rate https://api.github.com=1
+    cat names.txt | python -m app.prefetch -
+
+Runs every name through the same lookup/compose pipeline as /a2a/dev and
+writes the results into the SQLite cache through its batching writer.
+Names that already have a fresh cache entry (or a knowledge-base record)
+are skipped, so an interrupted run can simply be started again. With
+--force they are looked up again, every source included.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import Counter
+
+from . import main
+
+# Conservative default requests/second per upstream host.
+DEFAULT_RATES = {
+    main.WIKIPEDIA_BASE_URL: 10.0,
+    main.NPM_BASE_URL: 10.0,
+    main.PYPI_BASE_URL: 10.0,
+    main.GITHUB_API_BASE_URL: 1.0,
+}
+
+
+def read_names(path: str) -> list:
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in stream if line.strip() and not line.startswith("#")]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+async def prefetch(names, concurrency: int = 8, rates: dict = None, force: bool = False,
+                   budget: float = 60.0, progress=None) -> dict:
+    async with main.lifespan(main.app):
+        main.ensure_upstreams()
+        for origin, rate in {**DEFAULT_RATES, **(rates or {})}.items():
+            main.http.set_rate_limit(origin, rate)
+        # rate limiting queues requests, so give each source the whole budget
+        main.lookup.budget = budget
+        main.lookup.deadlines = {source: budget for source in main.lookup.deadlines}
+        # forcing also skips the fresh per-source parts, or nothing would be refetched
+        main.lookup.reuse_sources = not force
+        # names are resolved once, so with the knowledge base's aliases
+        await main.kb_names
+
+        # one lookup per canonical entity
+        entities = {}
+        for name in names:
+            entity = main.resolve_entity(name)
+            entities.setdefault(entity.canonical, entity)
+
+        sem = asyncio.Semaphore(concurrency)
+        counts = Counter()
+        failures = Counter()
+        started = time.perf_counter()
+
+        async def one(key, entity):
+            if key in main.kb:
+                counts["knowledge_base"] += 1
+                return
+            if not force and await main.cache.store.get(key):
+                counts["already_cached"] += 1
+                return
+            async with sem:
+                try:
+                    payload = await main.fetch_and_cache(key, entity)
+                except Exception:
+                    counts["errors"] += 1
+                    return
+            partial = payload.get("_partial") or []
+            failures.update(partial)
+            counts["partial" if partial else "fetched"] += 1
+            if progress:
+                progress(sum(counts.values()), len(entities))
+
+        await asyncio.gather(*(one(k, e) for k, e in entities.items()))
+        await main.cache.store.flush()
+        elapsed = time.perf_counter() - started
+
+        covered = 0
+        for key in entities:
+            if key in main.kb or await main.cache.store.get(key):
+                covered += 1
+
+        fetched = counts["fetched"] + counts["partial"]
+        return {
+            "names": len(names),
+            "entities": len(entities),
+            "counts": dict(counts),
+            "failures_by_source": dict(failures),
+            "elapsed_seconds": round(elapsed, 3),
+            "lookups_per_second": round(fetched / elapsed, 2) if elapsed else None,
+            "coverage": round(covered / len(entities), 4) if entities else 1.0,
+        }
+
+
+def _parse_rate(value: str):
+    origin, _, rate = value.rpartition("=")
+    if not origin:
+        raise argparse.ArgumentTypeError("expected ORIGIN=REQUESTS_PER_SECOND")
+    return origin, float(rate)
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.prefetch", description=__doc__.split("\n\n")[0])
+    parser.add_argument("names", nargs="?", default="-", help="file with one name per line, or - for stdin")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", action="append", type=_parse_rate, default=[],
+                        help="per-host limit, e.g. https://api.github.com=1 (repeatable)")
+    parser.add_argument("--budget", type=float, default=60.0, help="seconds allowed per lookup")
+    parser.add_argument("--force", action="store_true", help="refetch names that are already cached, from every source")
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+    report = asyncio.run(prefetch(
+        read_names(args.names),
+        concurrency=args.concurrency,
+        rates=dict(args.rate),
+        force=args.force,
+        budget=args.budget,
+        progress=progress if sys.stderr.isatty() else None,
+    ))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    cli()
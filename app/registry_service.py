@@ -2,29 +2,59 @@
 import httpx
 from typing import Optional
 
+from .http_client import HTTPClientPool
+from .json_stream import JSONFieldReader
+from .negative_cache import NegativeCache
+
+# Upper bound on how much of a registry document is read. npm's /latest
+# is a single version manifest; PyPI is read only up to its "info" object.
+MAX_BODY_BYTES = 512 * 1024
+
 
 class RegistryService:
-    def __init__(self, user_agent: str = "DevEncycloAgent/1.0"):
+    def __init__(self, user_agent: str = "DevEncycloAgent/1.0", http: Optional[HTTPClientPool] = None,
+                 negative: Optional[NegativeCache] = None,
+                 npm_base_url: str = "https://registry.npmjs.org", pypi_base_url: str = "https://pypi.org"):
         self.headers = {"User-Agent": user_agent}
+        self.http = http or HTTPClientPool(user_agent=user_agent)
+        self.negative = negative or NegativeCache()
+        self.npm_base_url = npm_base_url.rstrip("/")
+        self.pypi_base_url = pypi_base_url.rstrip("/")
 
-    async def fetch_npm_latest(self, pkg_name: str) -> Optional[dict]:
-        url = f"https://registry.npmjs.org/{pkg_name}/latest"
-        async with httpx.AsyncClient(timeout=8.0, headers=self.headers) as client:
-            try:
-                r = await client.get(url)
-                if r.status_code == 200:
-                    return r.json()
-            except httpx.HTTPError:
-                return None
+    async def _fetch_json(self, source: str, pkg_name: str, url: str, field: Optional[str] = None) -> Optional[dict]:
+        """
+        GET a JSON document, reading at most MAX_BODY_BYTES. With ``field``,
+        only that top-level field is parsed (returned as ``{field: value}``)
+        and the download stops as soon as it is complete.
+        """
+        key = pkg_name.lower()
+        if self.negative.is_missing(source, key):
+            return None
+        reader = JSONFieldReader(field) if field else None
+        try:
+            r = await self.http.get(
+                url, headers=self.headers, timeout=8.0,
+                max_bytes=MAX_BODY_BYTES, stop_when=reader and reader.feed,
+            )
+            if r.status_code == 200:
+                if reader:
+                    return {field: reader.value} if reader.value is not None else None
+                return r.json()
+            if r.status_code == 404:
+                self.negative.mark_missing(source, key)
+        except (httpx.HTTPError, ValueError):
+            return None
         return None
 
+    def is_known_missing(self, source: str, pkg_name: str) -> bool:
+        """True if ``source`` ("npm" or "pypi") recently answered 404 for the package."""
+        return self.negative.has(source, pkg_name.lower())
+
+    async def fetch_npm_latest(self, pkg_name: str) -> Optional[dict]:
+        url = f"{self.npm_base_url}/{pkg_name}/latest"
+        return await self._fetch_json("npm", pkg_name, url)
+
     async def fetch_pypi_info(self, pkg_name: str) -> Optional[dict]:
-        url = f"https://pypi.org/pypi/{pkg_name}/json"
-        async with httpx.AsyncClient(timeout=8.0, headers=self.headers) as client:
-            try:
-                r = await client.get(url)
-                if r.status_code == 200:
-                    return r.json()
-            except httpx.HTTPError:
-                return None
-        return None
+        url = f"{self.pypi_base_url}/pypi/{pkg_name}/json"
+        # "info" precedes the releases map, which can run to megabytes
+        return await self._fetch_json("pypi", pkg_name, url, field="info")
@@ -0,0 +1,132 @@
+# app/resilience.py
+import time
+from collections import deque
+from typing import Optional
+
+
+class HostHealth:
+    """
+    Rolling view of one upstream host: recent latencies and outcomes.
+
+    It drives three decisions for HTTPClientPool:
+    - circuit breaker: after ``min_requests`` calls, an error rate of at
+      least ``error_threshold`` opens the circuit for ``open_seconds``.
+      Then a single probe is let through (half-open). Success closes the
+      circuit again; failure re-opens it.
+    - adaptive timeout: ``timeout_factor`` x p99 latency, kept between
+      ``min_timeout`` and the caller's own timeout.
+    - hedging: a GET still running after the p95 latency gets a duplicate
+      request, and the first answer wins.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, window: int = 100, error_threshold: float = 0.5, min_requests: int = 10,
+                 open_seconds: float = 30.0, min_timeout: float = 1.0, timeout_factor: float = 3.0,
+                 min_samples: int = 20, hedge_quantile: float = 0.95, clock=time.monotonic):
+        self.error_threshold = error_threshold
+        self.min_requests = min_requests
+        self.open_seconds = open_seconds
+        self.min_timeout = min_timeout
+        self.timeout_factor = timeout_factor
+        self.min_samples = min_samples
+        self.hedge_quantile = hedge_quantile
+        self.clock = clock
+
+        self._latencies = deque(maxlen=window)  # successful calls only
+        self._outcomes = deque(maxlen=window)   # True = ok
+        self.state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+        self.hedged = 0
+
+    # ---- bookkeeping -------------------------------------------------
+
+    def record(self, latency: float, ok: bool):
+        self._outcomes.append(ok)
+        if ok:
+            self._latencies.append(latency)
+
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+            if ok:
+                self.state = self.CLOSED
+                self._outcomes.clear()
+            else:
+                self._open()
+        elif self.state == self.CLOSED and self.error_rate() >= self.error_threshold \
+                and len(self._outcomes) >= self.min_requests:
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = self.clock()
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return 1 - sum(self._outcomes) / len(self._outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    # ---- decisions ---------------------------------------------------
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.clock() - self._opened_at >= self.open_seconds:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+            return True
+        if self.state == self.OPEN:
+            self.rejected += 1
+            return False
+        return True
+
+    def timeout(self, default: float) -> float:
+        if len(self._latencies) < self.min_samples:
+            return default
+        return max(self.min_timeout, min(default, self.percentile(0.99) * self.timeout_factor))
+
+    def hedge_delay(self) -> Optional[float]:
+        if self.state != self.CLOSED or len(self._latencies) < self.min_samples:
+            return None
+        return self.percentile(self.hedge_quantile)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "rejected": self.rejected,
+            "hedged": self.hedged,
+        }
+
+
+class Resilience:
+    """One HostHealth per upstream origin, created on first use."""
+
+    def __init__(self, hedging: bool = True, **health_options):
+        self.hedging = hedging
+        self.health_options = health_options
+        self._hosts = {}
+
+    def host(self, origin: str) -> HostHealth:
+        health = self._hosts.get(origin)
+        if health is None:
+            health = self._hosts[origin] = HostHealth(**self.health_options)
+        return health
+
+    def stats(self) -> dict:
+        return {origin: h.stats() for origin, h in self._hosts.items()}
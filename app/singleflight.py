@@ -0,0 +1,50 @@
+# app/singleflight.py
+import asyncio
+from typing import Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one execution.
+
+    The first caller for a key starts the work; everyone arriving while it
+    is in flight awaits the same future and gets the same result or
+    exception. The shared work is shielded, so a caller that is cancelled
+    (e.g. a client disconnect) does not cancel it for the others. The key
+    is released as soon as the work finishes, so errors are not sticky.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.executed = 0  # lookups actually run
+        self.shared = 0    # callers served by someone else's lookup (calls saved)
+        self.failed = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable]):
+        fut = self._inflight.get(key)
+        if fut is None:
+            self.executed += 1
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f, k=key: self._release(k, f))
+        else:
+            self.shared += 1
+        return await asyncio.shield(fut)
+
+    def _release(self, key: str, fut: asyncio.Future):
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter went away.
+        if not fut.cancelled() and fut.exception() is not None:
+            self.failed += 1
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "shared": self.shared,
+            "failed": self.failed,
+        }
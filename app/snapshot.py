@@ -0,0 +1,201 @@
+# app/snapshot.py
+"""
+Read-only, memory-mapped snapshot of the hottest cache entries, for
+instances that start cold (scale to zero).
+
+    python -m app.snapshot export --db ./data/agent_cache.db --out ./data/cache_snapshot.bin --limit 2000
+    python -m app.snapshot info ./data/cache_snapshot.bin
+
+Layout (little-endian):
+
+    header   magic, format version, entry count, created_at (epoch seconds)
+    index    one (key hash, offset, length) record per entry, sorted by hash
+    entries  key length, updated_at length, key, updated_at (ISO), payload
+
+Payloads are copied from the cache table as stored (format byte + JSON,
+possibly compressed), so exporting never re-encodes them. Opening maps
+the file and checks the header; lookups binary-search the index in place,
+so nothing is read until a key is asked for.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+from .cache_service import FORMAT_JSON, FORMAT_ZLIB_JSON, pack_payload, unpack_payload
+
+MAGIC = b"AGSNAP\x00\x00"
+VERSION = 1
+
+HEADER = struct.Struct("<8sIId")
+INDEX = struct.Struct("<QQI")
+ENTRY = struct.Struct("<HH")
+
+
+def key_hash(key: str) -> int:
+    # stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+def write_snapshot(path: str, rows) -> int:
+    """
+    Write ``(key, payload, updated_at)`` rows, payloads already packed.
+    The file is replaced atomically, so a running process keeps reading
+    the snapshot it mapped.
+    """
+    entries = []
+    for key, payload, updated_at in rows:
+        k, u = key.encode(), updated_at.encode()
+        entries.append((key_hash(key), ENTRY.pack(len(k), len(u)) + k + u + payload))
+    entries.sort(key=lambda e: e[0])
+
+    offset = HEADER.size + INDEX.size * len(entries)
+    index = []
+    for h, blob in entries:
+        index.append(INDEX.pack(h, offset, len(blob)))
+        offset += len(blob)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), time.time()))
+        f.writelines(index)
+        f.writelines(blob for _, blob in entries)
+    os.replace(tmp, path)
+    return len(entries)
+
+
+def hottest_rows(db_path: str, limit: int):
+    """The ``limit`` most used entries in the cache table, most used first."""
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT key, payload, updated_at FROM cache ORDER BY hits DESC, accessed_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        conn.close()
+    for key, payload, updated_at in rows:
+        if isinstance(payload, str):
+            payload = pack_payload(payload.encode())  # written before the binary format
+        elif not payload or payload[0] not in (FORMAT_JSON, FORMAT_ZLIB_JSON):
+            continue
+        yield key, payload, updated_at
+
+
+def export_snapshot(db_path: str, path: str, limit: int = 2000) -> int:
+    return write_snapshot(path, hottest_rows(db_path, limit))
+
+
+class Snapshot:
+    """A mapped snapshot file; ``open`` returns None if it is missing or unusable."""
+
+    def __init__(self, path: str, mm: mmap.mmap, load_seconds: float):
+        self.path = path
+        self._mm = mm
+        _, _, self.count, self.created_at = HEADER.unpack_from(mm, 0)
+        self.load_seconds = load_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open(cls, path: Optional[str]) -> Optional["Snapshot"]:
+        if not path:
+            return None
+        start = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None  # missing or empty
+        if len(mm) < HEADER.size:
+            mm.close()
+            return None
+        magic, version, count, _ = HEADER.unpack_from(mm, 0)
+        if magic != MAGIC or version != VERSION or len(mm) < HEADER.size + count * INDEX.size:
+            mm.close()
+            return None
+        return cls(path, mm, time.perf_counter() - start)
+
+    def _find(self, key: str) -> Optional[tuple]:
+        h = key_hash(key)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if INDEX.unpack_from(self._mm, HEADER.size + mid * INDEX.size)[0] < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        wanted = key.encode()
+        # equal hashes are adjacent; compare the stored keys
+        for i in range(lo, self.count):
+            entry_hash, offset, length = INDEX.unpack_from(self._mm, HEADER.size + i * INDEX.size)
+            if entry_hash != h:
+                break
+            key_len, ts_len = ENTRY.unpack_from(self._mm, offset)
+            start = offset + ENTRY.size
+            if self._mm[start:start + key_len] == wanted:
+                ts_start = start + key_len
+                return self._mm[ts_start:ts_start + ts_len], self._mm[ts_start + ts_len:offset + length]
+        return None
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def get_entry(self, key: str) -> Optional[tuple]:
+        """(payload, updated_at) for ``key``, or None."""
+        found = self._find(key)
+        if found is None:
+            self.misses += 1
+            return None
+        updated_at, payload = found
+        self.hits += 1
+        return unpack_payload(payload), datetime.fromisoformat(updated_at.decode())
+
+    def close(self):
+        self._mm.close()
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "entries": self.count,
+            "bytes": len(self._mm),
+            "created_at": datetime.utcfromtimestamp(self.created_at).isoformat(),
+            "load_ms": round(self.load_seconds * 1000, 3),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write the hottest cache entries to a snapshot file")
+    export.add_argument("--db", default=os.getenv("CACHE_DB", "./data/agent_cache.db"))
+    export.add_argument("--out", default=os.getenv("CACHE_SNAPSHOT", "./data/cache_snapshot.bin"))
+    export.add_argument("--limit", type=int, default=2000, help="number of entries to keep")
+    info = commands.add_parser("info", help="print a snapshot's header")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        start = time.perf_counter()
+        count = export_snapshot(args.db, args.out, args.limit)
+        print(f"exported {count} entries to {args.out} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+        return
+
+    snapshot = Snapshot.open(args.path)
+    if snapshot is None:
+        sys.exit(f"{args.path}: not a snapshot")
+    print(json.dumps(snapshot.stats(), indent=2))
+    snapshot.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,148 @@
+# app/task_service.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+
+class TaskStore:
+    """
+    In-memory store of A2A task objects (the ``result`` part of a
+    TaskResult), bounded by count and expired after ``ttl`` seconds.
+    """
+
+    def __init__(self, max_tasks: int = 10000, ttl: float = 3600.0):
+        self.max_tasks = max_tasks
+        self.ttl = ttl
+        self._tasks: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def put(self, task: dict):
+        task_id = task["id"]
+        self._tasks.pop(task_id, None)
+        self._tasks[task_id] = (task, time.monotonic() + self.ttl)
+        while len(self._tasks) > self.max_tasks:
+            self._tasks.popitem(last=False)
+
+    def get(self, task_id: str) -> Optional[dict]:
+        entry = self._tasks.get(task_id)
+        if entry is None:
+            return None
+        task, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._tasks[task_id]
+            return None
+        return task
+
+    def __len__(self):
+        return len(self._tasks)
+
+
+class TaskRunner:
+    """
+    Bounded background worker pool. ``submit`` queues a job and returns
+    immediately; at most ``workers`` jobs run at once and at most
+    ``max_queue`` wait. A full queue raises ``asyncio.QueueFull``.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 100):
+        self.workers = workers
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._workers = []
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def submit(self, job: Callable[[], Awaitable]):
+        self._queue.put_nowait(job)
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await job()
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+            finally:
+                self._queue.task_done()
+
+    async def close(self):
+        for w in self._workers:
+            w.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize(),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class PushNotifier:
+    """
+    Delivers finished tasks to a client's pushNotificationConfig URL,
+    retrying transport errors, 429 and 5xx responses with exponential
+    backoff.
+
+    Receiver URLs come from clients, so pushes use one client of their own
+    rather than HTTPClientPool: that pool keeps a client, a circuit
+    breaker and metric labels per origin, meant for the few upstreams.
+    """
+
+    def __init__(self, user_agent: str = "DevEncycloAgent/1.0", retries: int = 3, backoff: float = 0.5,
+                 timeout: float = 10.0, max_connections: int = 20):
+        self.http = httpx.AsyncClient(
+            headers={"User-Agent": user_agent},
+            limits=httpx.Limits(max_connections=max_connections),
+            timeout=timeout,
+        )
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._pending = set()
+        self.delivered = 0
+        self.failed = 0
+
+    def send(self, config, task: dict):
+        """Schedule delivery without blocking the caller."""
+        t = asyncio.create_task(self.deliver(config, task))
+        self._pending.add(t)
+        t.add_done_callback(self._pending.discard)
+
+    async def deliver(self, config, task: dict) -> bool:
+        headers = {"Content-Type": "application/json"}
+        if config.token:
+            headers["Authorization"] = f"Bearer {config.token}"
+
+        for attempt in range(self.retries + 1):
+            try:
+                r = await self.http.post(config.url, json=task, headers=headers, timeout=self.timeout)
+                if r.status_code < 400:
+                    self.delivered += 1
+                    return True
+                if r.status_code != 429 and r.status_code < 500:
+                    break  # the receiver rejected it; retrying won't help
+            except httpx.HTTPError:
+                pass
+            if attempt < self.retries:
+                await asyncio.sleep(self.backoff * (2 ** attempt))
+
+        self.failed += 1
+        return False
+
+    async def close(self):
+        for t in list(self._pending):
+            t.cancel()
+        await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.http.aclose()
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "delivered": self.delivered, "failed": self.failed}
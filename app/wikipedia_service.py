@@ -3,32 +3,121 @@ import httpx
 import urllib.parse
 from typing import Optional
 
+from .http_client import HTTPClientPool
+from .negative_cache import NegativeCache
+
+
 class WikipediaService:
-    def __init__(self, user_agent: str = "DevEncycloAgent/1.0"):
+    def __init__(self, user_agent: str = "DevEncycloAgent/1.0", http: Optional[HTTPClientPool] = None,
+                 negative: Optional[NegativeCache] = None, titles=None, base_url: str = "https://en.wikipedia.org"):
         self.headers = {"User-Agent": user_agent}
+        self.http = http or HTTPClientPool(user_agent=user_agent)
+        self.negative = negative or NegativeCache()
+        self.titles = titles  # WikiTitleMap; remembers which page a query resolved to
+        self.query_url = f"{base_url.rstrip('/')}/w/api.php"
+        self.summary_url = f"{base_url.rstrip('/')}/api/rest_v1/page/summary/"
+
+    @staticmethod
+    def candidates(title: str) -> list:
+        # Exact title + common variations
+        return list(dict.fromkeys([
+            title,
+            title.replace(" ", "_"),
+            title.title().replace(" ", "_")
+        ]))
+
+    def is_known_missing(self, title: str) -> bool:
+        """True if every title candidate recently answered 404."""
+        return all(self.negative.has("wikipedia", c) for c in self.candidates(title))
 
-    async def fetch_summary(self, title: str) -> Optional[dict]:
+    async def fetch_summary(self, title: str, hint: Optional[str] = None) -> Optional[dict]:
         """
-        Fetch summary from MediaWiki REST API. Try a few title heuristics.
-        Returns the JSON response or None.
+        Fetch a page summary for ``title``. ``hint`` is a curated page title
+        (e.g. "React (software)") tried before the heuristic variants.
+
+        A query whose page is already known is one REST summary call.
+        Otherwise every candidate is resolved in a single MediaWiki
+        ``action=query`` request, following redirects, the winning page is
+        remembered for next time and its REST summary fetched, so both
+        paths return the same extract. Returns the summary or None.
         """
-        async with httpx.AsyncClient(timeout=10.0, headers=self.headers) as client:
-            # Try exact title + common variations
-            candidates = [
-                title,
-                title.replace(" ", "_"),
-                title.title().replace(" ", "_")
-            ]
-
-            for c in candidates:
-                encoded = urllib.parse.quote(c)
-                url = f"https://en.wikipedia.org/api/rest_v1/page/summary/{encoded}"
-
-                try:
-                    r = await client.get(url)
-                    if r.status_code == 200:
-                        return r.json()
-                except httpx.HTTPError:
-                    continue
-
-        return None
+        known = await self.titles.get(title) if self.titles else None
+        if known:
+            status, resp = await self._fetch_page(known)
+            if resp is not None:
+                return resp
+            if status != 404:
+                return None  # timeout, 5xx or open circuit: keep the title, the lookup counts a failure
+            # the page moved or went away: forget it and resolve again below
+            await self.titles.set(title, None)
+
+        candidates = list(dict.fromkeys(([hint] if hint else []) + self.candidates(title)))
+        candidates = [c for c in candidates if not self.negative.is_missing("wikipedia", c)]
+        if not candidates:
+            return None
+
+        try:
+            r = await self.http.get(
+                self.query_url,
+                params={
+                    "action": "query",
+                    "format": "json",
+                    "formatversion": "2",
+                    "redirects": "1",
+                    "titles": "|".join(candidates),
+                    "prop": "pageprops",
+                    "ppprop": "disambiguation",
+                },
+                headers=self.headers,
+                timeout=10.0,
+            )
+            if r.status_code != 200:
+                return None
+            query = r.json().get("query") or {}
+        except (httpx.HTTPError, ValueError):
+            return None
+
+        page = self._pick(query, candidates)
+        if page is None:
+            return None
+        if self.titles:
+            await self.titles.set(title, page["title"])
+        return (await self._fetch_page(page["title"]))[1]
+
+    def _pick(self, query: dict, candidates: list) -> Optional[dict]:
+        """
+        First candidate (in order) that resolves to an existing page.
+        Disambiguation pages are only used when nothing better exists.
+        Candidates that don't exist are marked missing.
+        """
+        # "React_(software)" -> "React (software)" -> redirect target
+        moves = {m["from"]: m["to"] for m in query.get("normalized", [])}
+        moves.update({m["from"]: m["to"] for m in query.get("redirects", [])})
+        pages = {p.get("title"): p for p in query.get("pages", [])}
+
+        disambiguation = None
+        for c in candidates:
+            name, seen = c, set()
+            while name in moves and name not in seen:
+                seen.add(name)
+                name = moves[name]
+            page = pages.get(name)
+            if not page or page.get("missing") or page.get("invalid"):
+                self.negative.mark_missing("wikipedia", c)
+                continue
+            if "disambiguation" in (page.get("pageprops") or {}):
+                disambiguation = disambiguation or page
+                continue
+            return page
+        return disambiguation
+
+    async def _fetch_page(self, page_title: str) -> tuple:
+        """(status, REST summary or None); status is None if the request failed."""
+        url = self.summary_url + urllib.parse.quote(page_title.replace(" ", "_"), safe="")
+        try:
+            r = await self.http.get(url, headers=self.headers, timeout=10.0)
+            if r.status_code == 200:
+                return 200, r.json()
+            return r.status_code, None
+        except (httpx.HTTPError, ValueError):
+            return None, None
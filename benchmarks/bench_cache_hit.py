@@ -0,0 +1,96 @@
+# benchmarks/bench_cache_hit.py
+"""
+Cache-hit response cost: the full path against the pre-rendered fast path.
+
+    python -m benchmarks.bench_cache_hit --iterations 20000
+
+full:     Pydantic validation (when installed) + build_taskresult_from_cached
+          + json.dumps the way FastAPI's JSONResponse encodes it
+prepared: quick_parse-style checks + Formatter.render_cached
+
+Prints one JSON object with hits/second for each and the speed-up.
+"""
+import argparse
+import json
+import time
+
+from app.formatter import ORJSON_AVAILABLE, Formatter
+
+try:
+    from app.models import JSONRPCRequest
+except ImportError:
+    JSONRPCRequest = None
+
+BODY = {
+    "jsonrpc": "2.0",
+    "id": "bench-1",
+    "method": "message/send",
+    "params": {
+        "message": {
+            "kind": "message",
+            "role": "user",
+            "parts": [{"kind": "text", "text": "what is react?"}],
+            "messageId": "m-1",
+        }
+    },
+}
+
+PAYLOAD = {
+    "name": "react",
+    "purpose": "JavaScript library for building user interfaces",
+    "usage": "React is a free and open-source front-end JavaScript library " * 8,
+    "installation": ["npm install react", "yarn add react"],
+    "history": "",
+    "latest_version": "18.2.0",
+    "wiki_url": "https://en.wikipedia.org/wiki/React_(software)",
+    "source": "wikipedia|registry|github|fallback",
+}
+
+
+def full(f: Formatter, body: dict) -> bytes:
+    if JSONRPCRequest is not None:
+        JSONRPCRequest(**body)
+    result = f.build_taskresult_from_cached(body["id"], "task-1", "ctx-1", [], PAYLOAD)
+    return json.dumps(result, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def prepared(f: Formatter, prepared_result, body: dict) -> bytes:
+    # the same shape checks quick_parse does
+    msg = body["params"]["message"]
+    for part in msg["parts"]:
+        if part["kind"] == "text" and part["text"]:
+            part["text"].strip()
+            break
+    return f.render_cached(prepared_result, body["id"], "task-1", "ctx-1")
+
+
+def measure(fn, iterations: int) -> float:
+    fn()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return iterations / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    f = Formatter()
+    ready = f.prepare_cached(PAYLOAD)
+    full_rate = measure(lambda: full(f, BODY), args.iterations)
+    fast_rate = measure(lambda: prepared(f, ready, BODY), args.iterations)
+
+    print(json.dumps({
+        "iterations": args.iterations,
+        "pydantic": JSONRPCRequest is not None,
+        "orjson": ORJSON_AVAILABLE,
+        "full_hits_per_second": round(full_rate),
+        "prepared_hits_per_second": round(fast_rate),
+        "speedup": round(fast_rate / full_rate, 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_startup.py
+"""
+Cold start: time from launching the agent to its first answered request.
+
+    python -m benchmarks.bench_startup --snapshot ./data/cache_snapshot.bin --query express
+
+Starts uvicorn as a subprocess (with an empty cache database, so answers
+can only come from the snapshot or the upstreams), sends ``--query`` until
+it is answered and prints the wall time along with the agent's own
+startup milestones from /stats. Run it with and without ``--snapshot``
+to compare.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from .load import rpc_body
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_startup", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--snapshot", default="", help="snapshot file to map (default: none)")
+    parser.add_argument("--query", default="express",
+                        help="a cached name that is not in the knowledge base (those are answered before the cache)")
+    parser.add_argument("--port", type=int, default=9300)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        "CACHE_DB": os.path.join(tempfile.mkdtemp(prefix="agent-startup-"), "cache.db"),
+        "CACHE_SNAPSHOT": args.snapshot,
+        "HTTP_WARMUP": "0",
+    }
+    started = time.perf_counter()
+    proc = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(args.port),
+        "--log-level", "warning", "--no-access-log",
+    ], env=env)
+    try:
+        with httpx.Client(timeout=args.timeout) as client:
+            while True:
+                try:
+                    r = client.post(f"{url}/a2a/dev", json=rpc_body(args.query))
+                    if r.status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.perf_counter() - started > args.timeout:
+                    sys.exit("agent did not answer in time")
+                time.sleep(0.005)
+            first_answer = time.perf_counter() - started
+            stats = client.get(f"{url}/stats").json()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    snapshot = (stats.get("cache") or {}).get("snapshot")
+    print(json.dumps({
+        "snapshot": args.snapshot or None,
+        "first_answer_seconds": round(first_answer, 3),
+        "agent_startup_seconds": stats.get("startup_seconds"),
+        "snapshot_hits": snapshot["hits"] if snapshot else None,
+        "snapshot_load_ms": snapshot["load_ms"] if snapshot else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# benchmarks/load.py
+"""
+Offline load test for /a2a/dev against local stub upstreams.
+
+    python -m benchmarks.load --requests 2000 --concurrency 50 --latency 0.05
+
+Starts benchmarks.stubs and the agent (uvicorn) as subprocesses, with a
+fresh cache database and the agent's *_BASE_URL settings pointing at the
+stubs, then runs three workloads:
+
+    cold   every request is a name the agent has never seen
+    warm   a fixed set of names, looked up once beforehand
+    mixed  ``--warm-ratio`` warm names, the rest cold
+
+and reports requests/second, p50/p95/p99 latency, errors, upstream calls
+per request and the agent's memory for each. Results are written as JSON
+(``--output``) so runs can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+import httpx
+
+from .stubs import UPSTREAMS, base_urls
+
+
+def percentile(ordered: list, q: float):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def rss_kb(pid: int) -> dict:
+    """Current and peak resident memory of a process (Linux /proc)."""
+    out = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":", 1)
+                    out["rss_kb" if key == "VmRSS" else "peak_rss_kb"] = int(value.split()[0])
+    except OSError:
+        pass
+    return out
+
+
+def rpc_body(text: str) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": "message/send",
+        "params": {"message": {"kind": "message", "role": "user",
+                               "parts": [{"kind": "text", "text": text}]}},
+    }
+
+
+async def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} did not come up")
+            await asyncio.sleep(0.2)
+
+
+async def upstream_calls(client: httpx.AsyncClient, stubs: dict, reset: bool = False) -> int:
+    total = 0
+    for url in stubs.values():
+        r = await (client.post(f"{url}/_reset") if reset else client.get(f"{url}/_stats"))
+        total += r.json()["calls"]
+    return total
+
+
+async def run_workload(client, agent_url: str, stubs: dict, names: list, concurrency: int) -> dict:
+    await upstream_calls(client, stubs, reset=True)
+    queue = asyncio.Queue()
+    for name in names:
+        queue.put_nowait(name)
+    latencies, errors = [], 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            try:
+                name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            try:
+                r = await client.post(f"{agent_url}/a2a/dev", json=rpc_body(name))
+                ok = r.status_code == 200 and "result" in r.json()
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    calls = await upstream_calls(client, stubs)
+
+    ordered = sorted(latencies)
+
+    def ms(v):
+        return round(v * 1000, 2) if v is not None else None
+
+    return {
+        "requests": len(names),
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(len(names) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(percentile(ordered, 0.50)),
+            "p95": ms(percentile(ordered, 0.95)),
+            "p99": ms(percentile(ordered, 0.99)),
+            "max": ms(ordered[-1] if ordered else None),
+        },
+        "upstream_calls": calls,
+        "upstream_calls_per_request": round(calls / len(names), 3) if names else None,
+    }
+
+
+async def benchmark(args, agent_pid: int, agent_url: str, stubs: dict) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    warm_names = [f"benchpkg-warm-{run_id}-{i}" for i in range(args.warm_set)]
+    cold = iter(f"benchpkg-cold-{run_id}-{i}" for i in range(10 ** 9))
+    rng = random.Random(args.seed)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60.0) as client:
+        results = {}
+
+        results["cold"] = await run_workload(
+            client, agent_url, stubs, [next(cold) for _ in range(args.requests)], args.concurrency)
+        results["cold"]["memory"] = rss_kb(agent_pid)
+
+        # fill the cache for the warm set, then measure hits only
+        await run_workload(client, agent_url, stubs, warm_names, args.concurrency)
+        results["warm"] = await run_workload(
+            client, agent_url, stubs, [rng.choice(warm_names) for _ in range(args.requests)], args.concurrency)
+        results["warm"]["memory"] = rss_kb(agent_pid)
+
+        mixed = [rng.choice(warm_names) if rng.random() < args.warm_ratio else next(cold)
+                 for _ in range(args.requests)]
+        results["mixed"] = await run_workload(client, agent_url, stubs, mixed, args.concurrency)
+        results["mixed"]["memory"] = rss_kb(agent_pid)
+
+        results["agent_stats"] = (await client.get(f"{agent_url}/stats")).json()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per workload")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warm-set", type=int, default=100, help="distinct names in the warm workload")
+    parser.add_argument("--warm-ratio", type=float, default=0.8, help="share of warm names in the mixed workload")
+    parser.add_argument("--latency", type=float, default=0.05, help="stub latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--payload-kb", type=int, default=16)
+    parser.add_argument("--stub-port", type=int, default=9100)
+    parser.add_argument("--agent-port", type=int, default=9200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=None, help="JSON file (default benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args(argv)
+
+    host = "127.0.0.1"
+    stubs = dict(zip(UPSTREAMS, base_urls(host, args.stub_port).values()))
+    agent_url = f"http://{host}:{args.agent_port}"
+    workdir = tempfile.mkdtemp(prefix="agent-bench-")
+
+    stub_proc = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.stubs", "--host", host, "--port", str(args.stub_port),
+        "--latency", str(args.latency), "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate), "--payload-kb", str(args.payload_kb),
+    ])
+    env = {
+        **os.environ,
+        **base_urls(host, args.stub_port),
+        "CACHE_DB": os.path.join(workdir, "cache.db"),
+        "HTTP2": "0",
+        "HTTP_WARMUP": "0",
+    }
+    agent_proc = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "app.main:app", "--host", host, "--port", str(args.agent_port),
+        "--log-level", "warning", "--no-access-log",
+    ], env=env)
+
+    async def run():
+        await wait_ready(f"{stubs['npm']}/_stats")
+        await wait_ready(f"{agent_url}/health")
+        return await benchmark(args, agent_proc.pid, agent_url, stubs)
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        for proc in (agent_proc, stub_proc):
+            proc.terminate()
+        for proc in (agent_proc, stub_proc):
+            proc.wait(timeout=10)
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "settings": {k: v for k, v in vars(args).items() if k != "output"},
+        "workloads": results,
+    }
+    output = args.output or os.path.join(
+        os.path.dirname(__file__), "results", datetime.utcnow().strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps({name: {k: w[k] for k in ("requests_per_second", "latency_ms", "upstream_calls_per_request")}
+                      for name, w in results.items() if name != "agent_stats"}, indent=2))
+    print(f"results written to {output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# benchmarks/stubs.py
+"""
+Local stand-ins for the Wikipedia, npm, PyPI and GitHub APIs.
+
+    python -m benchmarks.stubs --port 9100 --latency 0.05 --error-rate 0.01 --payload-kb 64
+
+Each upstream gets its own port (wikipedia = port, npm = port + 1,
+pypi = port + 2, github = port + 3), so the agent keeps one connection
+pool per "host" as it does in production. Every stub answers any name
+with a plausible document after ``latency`` (+/- ``jitter``) seconds,
+fails ``error_rate`` of requests with a 503, and pads its bodies to about
+``payload_kb`` KiB the way the real APIs do (npm readme, PyPI releases,
+GitHub README). ``GET /_stats`` returns and ``POST /_reset`` clears the
+per-stub call counter.
+"""
+import argparse
+import asyncio
+import random
+from dataclasses import dataclass
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+UPSTREAMS = ("wikipedia", "npm", "pypi", "github")
+
+
+@dataclass
+class StubConfig:
+    latency: float = 0.05
+    jitter: float = 0.02
+    error_rate: float = 0.0
+    payload_kb: int = 16
+
+
+def base_urls(host: str, port: int) -> dict:
+    """Agent environment variables pointing at stubs started on ``port``."""
+    names = ("WIKIPEDIA_BASE_URL", "NPM_BASE_URL", "PYPI_BASE_URL", "GITHUB_API_BASE_URL")
+    return {name: f"http://{host}:{port + i}" for i, name in enumerate(names)}
+
+
+def make_stub(upstream: str, config: StubConfig) -> FastAPI:
+    stub = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+    stub.state.calls = 0
+    filler = "x" * (config.payload_kb * 1024)
+
+    @stub.middleware("http")
+    async def simulate(request: Request, call_next):
+        if request.url.path.startswith("/_"):
+            return await call_next(request)
+        stub.state.calls += 1
+        await asyncio.sleep(max(0.0, config.latency + random.uniform(-config.jitter, config.jitter)))
+        if random.random() < config.error_rate:
+            return Response(status_code=503)
+        return await call_next(request)
+
+    @stub.get("/_stats")
+    async def stats():
+        return {"upstream": upstream, "calls": stub.state.calls}
+
+    @stub.post("/_reset")
+    async def reset():
+        stub.state.calls = 0
+        return {"upstream": upstream, "calls": 0}
+
+    if upstream == "wikipedia":
+        def page(title: str) -> dict:
+            return {
+                "title": title,
+                "description": f"{title} software",
+                "extract": f"{title} is a library. " + filler[:2048],
+                "fullurl": f"https://en.wikipedia.org/wiki/{title.replace(' ', '_')}",
+            }
+
+        @stub.get("/w/api.php")
+        async def query(titles: str = ""):
+            first = titles.split("|")[0].replace("_", " ")
+            return {"query": {"pages": [page(first)]}}
+
+        @stub.get("/api/rest_v1/page/summary/{title}")
+        async def summary(title: str):
+            p = page(title.replace("_", " "))
+            return {**p, "content_urls": {"desktop": {"page": p["fullurl"]}}}
+
+    elif upstream == "npm":
+        @stub.get("/{name}/latest")
+        async def npm_latest(name: str):
+            return {"name": name, "version": "1.0.0", "description": f"{name} for npm", "readme": filler}
+
+    elif upstream == "pypi":
+        @stub.get("/pypi/{name}/json")
+        async def pypi_json(name: str):
+            # like the real document: a small "info" followed by a large "releases" map
+            releases = {f"0.{i}.0": [{"url": filler[:1024]}] for i in range(config.payload_kb)}
+            return {"info": {"name": name, "version": "1.0.0", "summary": f"{name} for Python"},
+                    "last_serial": 1, "releases": releases}
+
+    elif upstream == "github":
+        @stub.get("/repos/{owner}/{repo}/releases/latest")
+        async def release(owner: str, repo: str):
+            return {"tag_name": "v1.0.0", "name": "v1.0.0", "body": filler}
+
+        @stub.get("/repos/{owner}/{repo}/tags")
+        async def tags(owner: str, repo: str):
+            return [{"name": "v1.0.0"}]
+
+        @stub.get("/repos/{owner}/{repo}/readme")
+        async def readme(owner: str, repo: str):
+            return PlainTextResponse(f"# {repo}\n\nnpm install {repo}\n\n" + filler)
+
+        @stub.get("/search/repositories")
+        async def search(q: str = ""):
+            return JSONResponse({"items": [{"name": q, "owner": {"login": q},
+                                            "html_url": f"https://github.com/{q}/{q}"}]})
+
+    return stub
+
+
+async def serve(host: str, port: int, config: StubConfig):
+    servers = [
+        uvicorn.Server(uvicorn.Config(make_stub(name, config), host=host, port=port + i,
+                                      log_level="warning", access_log=False))
+        for i, name in enumerate(UPSTREAMS)
+    ]
+    await asyncio.gather(*(s.serve() for s in servers))
+
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.stubs", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100, help="first of four consecutive ports")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per upstream call")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.add_argument("--payload-kb", type=int, default=16, help="approximate body size")
+    args = parser.parse_args(argv)
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.payload_kb)
+    asyncio.run(serve(args.host, args.port, config))
+
+
+if __name__ == "__main__":
+    cli()
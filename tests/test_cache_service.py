@@ -0,0 +1,325 @@
+# tests/test_cache_service.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.cache_service import FORMAT_JSON, FORMAT_ZLIB_JSON, SQLiteCache, SourceCache, TieredCache, WikiTitleMap
+from app.memory_cache import MemoryCache
+
+
+def _age_rows(db_path, delta):
+    old = (datetime.utcnow() - delta).isoformat()
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE cache SET updated_at = ?", (old,))
+    conn.commit()
+    conn.close()
+
+
+def test_memory_cache_evicts_least_recently_used():
+    mem = MemoryCache(max_entries=2)
+    mem.set("a", {"v": 1}, 60)
+    mem.set("b", {"v": 2}, 60)
+    assert mem.get("a") == {"v": 1}
+    mem.set("c", {"v": 3}, 60)
+
+    assert mem.get("b") is None
+    assert mem.get("a") == {"v": 1}
+    assert mem.get("c") == {"v": 3}
+    assert mem.evictions == 1
+
+
+def test_memory_cache_respects_byte_bound_and_ttl():
+    mem = MemoryCache(max_entries=100, max_bytes=40)
+    mem.set("a", {"text": "x" * 10}, 60)
+    mem.set("b", {"text": "y" * 10}, 60)
+    assert mem.get("a") is None
+    assert mem.bytes <= 40
+
+    mem.set("short", {"v": 1}, 0.01)
+    time.sleep(0.02)
+    assert mem.get("short") is None
+
+
+def test_tiered_cache_promotes_with_remaining_ttl(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), ttl_days=1, hard_ttl_days=1)
+
+    async def main():
+        await store.set("react", {"name": "react"})
+        # pretend the row was written 23 hours ago
+        _age_rows(store.db_path, timedelta(hours=23))
+
+        cache = TieredCache(store, MemoryCache())
+        assert await cache.get("react") == {"name": "react"}
+        assert await cache.get("react") == {"name": "react"}
+        await store.close()
+        return cache
+
+    cache = asyncio.run(main())
+    stats = cache.stats()
+    assert stats["sqlite"]["hits"] == 1
+    assert stats["memory"]["hits"] == 1
+    _, expires_at, _ = cache.memory._data["react"]
+    assert expires_at - time.monotonic() <= 3600
+
+
+def test_writer_batches_queued_sets(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), flush_interval=0.05)
+
+    async def main():
+        await store.start()
+        for i in range(20):
+            await store.set(f"k{i}", {"i": i})
+        await store.flush()
+        value = await store.get("k7")
+        await store.close()
+        return value
+
+    assert asyncio.run(main()) == {"i": 7}
+    assert store.writes == 20
+    assert store.batches == 1
+
+
+def test_purge_removes_expired_rows(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), ttl_days=1)
+
+    async def main():
+        await store.set_many([("old", {"v": 1}), ("older", {"v": 2})])
+        _age_rows(store.db_path, timedelta(days=2))
+        await store.set("fresh", {"v": 3})
+        removed = await store.purge_expired()
+        fresh = await store.get("fresh")
+        await store.close()
+        return removed, fresh
+
+    assert asyncio.run(main()) == (2, {"v": 3})
+
+
+def test_entries_past_soft_ttl_are_served_stale(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), ttl_days=1, hard_ttl_days=3)
+
+    async def main():
+        await store.set_many([("stale", {"v": 1}), ("gone", {"v": 2})])
+        _age_rows(store.db_path, timedelta(days=2))
+        cache = TieredCache(store, MemoryCache())
+        stale = await cache.get("stale")
+        again = await cache.get("stale")  # now from memory
+
+        _age_rows(store.db_path, timedelta(days=4))
+        gone = await cache.get("gone")
+
+        await cache.set("stale", {"v": 3})
+        refreshed = await cache.get("stale")
+        await store.close()
+        return stale, again, gone, refreshed
+
+    stale, again, gone, refreshed = asyncio.run(main())
+    assert stale == {"v": 1, "_stale": True}
+    assert again == {"v": 1, "_stale": True}
+    assert gone is None
+    assert refreshed == {"v": 3}
+
+
+def test_payload_ttl_shortens_the_soft_ttl(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), ttl_days=14)
+
+    async def main():
+        await store.set_many([("short", {"v": 1, "_ttl": 3600}), ("long", {"v": 2})])
+        _age_rows(store.db_path, timedelta(hours=2))
+        cache = TieredCache(store, MemoryCache())
+        result = await cache.get("short"), await cache.get("long")
+        await store.close()
+        return result
+
+    short, long = asyncio.run(main())
+    assert short["_stale"] is True
+    assert "_stale" not in long
+
+
+def test_wiki_title_map_persists_and_forgets(tmp_path):
+    db = str(tmp_path / "cache.db")
+
+    async def main():
+        store = SQLiteCache(db)
+        titles = WikiTitleMap(store)
+        await titles.set("React", "React (software)")
+        await store.close()
+
+        store = SQLiteCache(db)
+        titles = WikiTitleMap(store)
+        learned = await titles.get("  react ")
+        await titles.set("react", None)
+        forgotten = await titles.get("react")
+        await store.close()
+        return learned, forgotten
+
+    assert asyncio.run(main()) == ("React (software)", None)
+
+
+def test_payloads_are_compressed_and_old_text_rows_still_read(tmp_path):
+    db = str(tmp_path / "cache.db")
+    store = SQLiteCache(db)
+    big = {"usage": "npm install react " * 200}
+
+    async def main():
+        await store.set_many([("big", big), ("small", {"v": 1})])
+        conn = sqlite3.connect(db)
+        rows = dict(conn.execute("SELECT key, payload FROM cache"))
+        # a row as written before the binary format
+        conn.execute("INSERT INTO cache (key, payload, updated_at) VALUES (?, ?, ?)",
+                     ("legacy", '{"v": 2}', datetime.utcnow().isoformat()))
+        conn.commit()
+        conn.close()
+        values = [await store.get(k) for k in ("big", "small", "legacy")]
+        await store.close()
+        return rows, values
+
+    rows, values = asyncio.run(main())
+    assert rows["big"][0] == FORMAT_ZLIB_JSON and len(rows["big"]) < 1000
+    assert rows["small"][0] == FORMAT_JSON
+    assert values == [big, {"v": 1}, {"v": 2}]
+
+
+def _pages(db_path):
+    conn = sqlite3.connect(db_path)
+    pages, free = (conn.execute(f"PRAGMA {p}").fetchone()[0] for p in ("page_count", "freelist_count"))
+    conn.close()
+    return pages, free
+
+
+def _evict(tmp_path, eviction):
+    store = SQLiteCache(str(tmp_path / "cache.db"), max_entries=10, eviction=eviction)
+    cache = TieredCache(store, MemoryCache())
+
+    async def main():
+        await store.set_many([(f"k{i}", {"i": i}) for i in range(20)])
+        # k0 is read often but a while ago; k10-k19 once each, recently
+        for _ in range(3):
+            await cache.get("k0")
+        await asyncio.sleep(0.01)
+        for i in range(10, 20):
+            await cache.get(f"k{i}")
+        await store.flush_touches()
+        removed = await store.enforce_limits()
+        kept = {k for k in (f"k{i}" for i in range(20)) if await store.get(k)}
+        await store.close()
+        return removed, kept
+
+    return asyncio.run(main())
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path):
+    removed, kept = _evict(tmp_path, "lru")
+    assert removed == 11
+    assert kept == {f"k{i}" for i in range(11, 20)}
+
+
+def test_lfu_eviction_keeps_frequently_read_entries(tmp_path):
+    removed, kept = _evict(tmp_path, "lfu")
+    assert removed == 11
+    assert kept == {"k0"} | {f"k{i}" for i in range(12, 20)}
+
+
+def test_byte_bound_evicts_and_compacts(tmp_path):
+    db = str(tmp_path / "cache.db")
+    store = SQLiteCache(db, max_bytes=256 * 1024, vacuum_pages=16)
+
+    async def main():
+        noise = [{"blob": os.urandom(4096).hex()} for _ in range(200)]
+        await store.set_many([(f"k{i}", n) for i, n in enumerate(noise)])
+        before = _pages(db)
+        removed = await store.enforce_limits()
+        released = await store.compact()
+        after = _pages(db)
+        await store.close()
+        return before, removed, released, after
+
+    before, removed, released, after = asyncio.run(main())
+    assert store.auto_vacuum
+    assert removed > 0 and released > 0
+    assert after[1] == 0 and after[0] < before[0]
+    assert store.stored_bytes <= 256 * 1024
+
+
+def test_byte_bound_only_counts_cached_answers(tmp_path):
+    db = str(tmp_path / "cache.db")
+    store = SQLiteCache(db, max_bytes=256 * 1024)
+    sources = SourceCache(store)
+
+    async def main():
+        for i in range(100):
+            await sources.set("npm", f"pkg{i}", {"readme": os.urandom(4096).hex()})
+        await store.set_many([(f"k{i}", {"v": i}) for i in range(50)])
+        removed = await store.enforce_limits()
+        kept = await store.get("k0")
+        await store.close()
+        return removed, kept
+
+    assert asyncio.run(main()) == (0, {"v": 0})
+
+
+def test_migration_enables_incremental_vacuum_on_old_files(tmp_path):
+    db = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(db)  # the original layout, auto_vacuum=NONE
+    conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, payload TEXT, updated_at TEXT)")
+    conn.execute("INSERT INTO cache VALUES (?, ?, ?)", ("react", '{"v": 1}', datetime.utcnow().isoformat()))
+    conn.commit()
+    conn.close()
+
+    store = SQLiteCache(db)
+    assert not store.auto_vacuum  # not rebuilt on the startup path
+
+    async def main():
+        await store.enable_auto_vacuum()
+        value = await store.get("react")
+        await store.close()
+        return value
+
+    assert asyncio.run(main()) == {"v": 1}
+    assert store.auto_vacuum
+
+
+def test_workers_starting_together_migrate_once(tmp_path):
+    db = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE cache (key TEXT PRIMARY KEY, payload TEXT, updated_at TEXT)")
+    conn.commit()
+    conn.close()
+
+    barrier = threading.Barrier(4)
+
+    def open_store():
+        barrier.wait()
+        return SQLiteCache(db)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        stores = list(pool.map(lambda _: open_store(), range(4)))
+
+    conn = sqlite3.connect(db)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(cache)")}
+    conn.close()
+    assert {"accessed_at", "hits"} <= columns
+    for store in stores:
+        asyncio.run(store.close())
+
+
+def test_waited_set_skips_the_batch_window(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"), flush_interval=1.0)
+
+    async def main():
+        await store.start()
+        await store.set("queued", {"v": 1})
+        started = time.perf_counter()
+        await store.set("waited", {"v": 2}, wait=True)
+        elapsed = time.perf_counter() - started
+        values = [await store.get("queued"), await store.get("waited")]
+        await store.close()
+        return elapsed, values
+
+    elapsed, values = asyncio.run(main())
+    assert elapsed < 0.5
+    assert values == [{"v": 1}, {"v": 2}]
+    assert store.batches == 1
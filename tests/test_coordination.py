@@ -0,0 +1,114 @@
+# tests/test_coordination.py
+import asyncio
+from datetime import datetime, timedelta
+
+from app.cache_service import SQLiteCache, TieredCache
+from app.coordination import WorkerCoordinator
+from app.memory_cache import MemoryCache
+
+
+def _worker(db, name, **kwargs):
+    """One 'process': its own connections, memory tier and coordinator."""
+    store = SQLiteCache(db)
+    cache = TieredCache(store, MemoryCache())
+    return cache, WorkerCoordinator(store, worker_id=name, poll_interval=0.01, **kwargs)
+
+
+def test_only_one_worker_fills_a_key(tmp_path):
+    db = str(tmp_path / "cache.db")
+    fills = []
+
+    async def main():
+        workers = [_worker(db, f"w{i}") for i in range(3)]
+        for cache, _ in workers:
+            await cache.store.start()
+
+        async def answer(cache, coordinator):
+            async def fill():
+                fills.append(coordinator.worker_id)
+                await asyncio.sleep(0.1)
+                await cache.set("react", {"name": "react"}, wait=True)
+                return {"name": "react"}
+
+            return await coordinator.run_once("react", fill, read=lambda: cache.reload("react"))
+
+        results = await asyncio.gather(*(answer(c, co) for c, co in workers))
+        for cache, _ in workers:
+            await cache.store.close()
+        return results, [co.stats() for _, co in workers]
+
+    results, stats = asyncio.run(main())
+    assert len(fills) == 1
+    assert results == [{"name": "react"}] * 3
+    assert sum(s["served_from_other_worker"] for s in stats) == 2
+
+
+def test_lease_freed_by_a_fill_is_not_filled_again(tmp_path):
+    db = str(tmp_path / "cache.db")
+    fills = []
+
+    async def main():
+        (a_cache, a), (b_cache, b) = _worker(db, "a"), _worker(db, "b")
+
+        def fill(cache, name):
+            async def run():
+                fills.append(name)
+                await cache.set("react", {"name": "react"}, wait=True)
+                return {"name": "react"}
+            return run
+
+        await a.run_once("react", fill(a_cache, "a"), read=lambda: a_cache.reload("react"))
+        # b missed before a's write landed and asks only after a released the lease
+        result = await b.run_once("react", fill(b_cache, "b"), read=lambda: b_cache.reload("react"))
+        await a_cache.store.close()
+        await b_cache.store.close()
+        return result
+
+    assert asyncio.run(main()) == {"name": "react"}
+    assert fills == ["a"]
+
+
+def test_waiter_takes_over_when_holder_writes_nothing(tmp_path):
+    db = str(tmp_path / "cache.db")
+
+    async def main():
+        (a_cache, a), (b_cache, b) = _worker(db, "a"), _worker(db, "b")
+
+        async def partial():
+            await asyncio.sleep(0.05)
+            return {"_partial": ["npm"]}
+
+        async def full():
+            return {"name": "x"}
+
+        first = asyncio.ensure_future(a.run_once("x", partial, read=lambda: a_cache.reload("x")))
+        await asyncio.sleep(0.01)
+        second = await b.run_once("x", full, read=lambda: b_cache.reload("x"))
+        await first
+        await a_cache.store.close()
+        await b_cache.store.close()
+        return second, b.stats()
+
+    second, stats = asyncio.run(main())
+    assert second == {"name": "x"}
+    assert stats["taken_over"] == 1
+
+
+def test_sync_drops_memory_copies_other_workers_replaced(tmp_path):
+    db = str(tmp_path / "cache.db")
+
+    async def main():
+        (a_cache, a), (b_cache, _) = _worker(db, "a"), _worker(db, "b")
+        since = datetime.utcnow() - timedelta(seconds=1)
+        await a_cache.set("react", {"v": 1})
+        await asyncio.sleep(0.01)
+        await b_cache.set("react", {"v": 2})
+
+        dropped = await a.sync_once(a_cache, since)
+        again = await a.sync_once(a_cache, since)  # nothing newer left in memory
+        value = await a_cache.get("react")
+        await a_cache.store.close()
+        await b_cache.store.close()
+        return dropped, again, value
+
+    assert asyncio.run(main()) == (1, 0, {"v": 2})
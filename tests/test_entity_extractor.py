@@ -0,0 +1,53 @@
+# tests/test_entity_extractor.py
+from app.entity_extractor import EntityExtractor, normalize
+from app.fallback_service import TECH_MAP, TECH_SYNONYMS
+
+extractor = EntityExtractor.build(
+    TECH_SYNONYMS, TECH_MAP, [("fastify", {"name": "Fastify", "aliases": ["fastify js"]})]
+)
+
+
+def test_variants_share_one_canonical_entity():
+    keys = {extractor.extract(t).canonical for t in ("React", "reactjs", "what is react?", "React JS")}
+    assert keys == {"react"}
+
+
+def test_longest_whole_word_match_wins():
+    assert extractor.extract("Tell me about Node.js.").canonical == "node.js"
+    assert extractor.extract("What is Tailwind CSS?").package == "tailwindcss"
+    assert not extractor.extract("preact").matched
+
+
+def test_match_must_cover_the_query_up_to_filler_words():
+    assert extractor.extract("tell me about django please").canonical == "django"
+    for text, query in (
+        ("React Native", "react native"),
+        ("django rest framework", "django rest framework"),
+        ("What is the next big thing?", "the next big thing"),
+    ):
+        entity = extractor.extract(text)
+        assert not entity.matched
+        assert entity.canonical == query
+
+
+def test_unknown_text_drops_question_prefix():
+    entity = extractor.extract("What is FastAPI?")
+    assert entity.canonical == "fastapi"
+    assert entity.wiki_title is None
+    assert normalize("  Vue.JS!! ") == "vue.js"
+
+
+def test_knowledge_base_records_are_matched():
+    assert extractor.extract("What is Fastify JS?").canonical == "fastify"
+
+
+def test_unknown_package_names_are_sent_upstream_unchanged():
+    entity = extractor.extract("What is typing_extensions?")
+    assert (entity.canonical, entity.package) == ("typing_extensions", "typing_extensions")
+    assert not entity.matched
+
+    scoped = extractor.extract("@types/node")
+    assert not scoped.matched and scoped.package == "@types/node"
+
+    repo = extractor.extract("facebook/react")
+    assert not repo.matched and repo.package == "facebook/react"
@@ -0,0 +1,82 @@
+# tests/test_formatter.py
+import asyncio
+import json
+import sqlite3
+from datetime import datetime, timedelta
+
+from app.cache_service import SQLiteCache, TieredCache
+from app.formatter import Formatter
+from app.memory_cache import MemoryCache
+
+PAYLOAD = {
+    "name": "react",
+    "purpose": 'JavaScript "UI" library',
+    "usage": "React is… \u0000id\u0000",
+    "installation": ["npm install react", "yarn add react"],
+    "history": "",
+    "latest_version": "18.2.0",
+    "wiki_url": "https://en.wikipedia.org/wiki/React_(software)",
+    "source": "wikipedia|registry|github|fallback",
+}
+
+
+def _without_generated(result):
+    task = result["result"]
+    task["status"]["timestamp"] = None
+    task["status"]["message"]["messageId"] = None
+    task["artifacts"][0]["artifactId"] = None
+    return result
+
+
+def test_prepared_result_matches_full_render():
+    f = Formatter()
+    prepared = f.prepare_cached(PAYLOAD)
+
+    fast = json.loads(f.render_cached(prepared, "req-1", "task-1", "ctx-1"))
+    slow = f.build_taskresult_from_cached("req-1", "task-1", "ctx-1", [], PAYLOAD)
+
+    assert _without_generated(fast) == _without_generated(slow)
+    assert fast["result"]["status"]["message"]["taskId"] == "task-1"
+
+
+def test_tiered_cache_keeps_prepared_result_for_fresh_entries(tmp_path):
+    f = Formatter()
+    store = SQLiteCache(str(tmp_path / "cache.db"))
+
+    async def main():
+        cache = TieredCache(store, MemoryCache(), prepare=f.prepare_cached)
+        await cache.set("react", PAYLOAD)
+        from_set = await cache.get_prepared("react")
+
+        await store.flush()
+        cache = TieredCache(store, MemoryCache(), prepare=f.prepare_cached)
+        promoted = await cache.get_prepared("react")
+        await store.close()
+        return from_set, promoted
+
+    from_set, promoted = asyncio.run(main())
+    assert from_set is not None and promoted is not None
+    body = json.loads(f.render_cached(promoted, "r", "t", "c"))
+    assert body["result"]["artifacts"][0]["parts"][0]["data"]["_cached"] is True
+
+
+def test_get_with_prepared_reads_sqlite_once_on_miss_and_stale(tmp_path):
+    f = Formatter()
+    store = SQLiteCache(str(tmp_path / "cache.db"), ttl_days=1, hard_ttl_days=3)
+
+    async def main():
+        cache = TieredCache(store, MemoryCache(), prepare=f.prepare_cached)
+        missing = await cache.get_with_prepared("nope")
+        await store.set("old", PAYLOAD)
+        conn = sqlite3.connect(store.db_path)
+        conn.execute("UPDATE cache SET updated_at = ?", ((datetime.utcnow() - timedelta(days=2)).isoformat(),))
+        conn.commit()
+        conn.close()
+        stale = await cache.get_with_prepared("old")
+        await store.close()
+        return missing, stale
+
+    missing, stale = asyncio.run(main())
+    assert missing == (None, None)
+    assert stale[0]["_stale"] is True and stale[1] is None
+    assert store.misses == 1 and store.stale_hits == 1
@@ -0,0 +1,89 @@
+# tests/test_github_service.py
+import asyncio
+import time
+
+import httpx
+
+from app.github_service import GitHubRateLimit, GitHubService
+
+
+class FakeHTTP:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+        self.unhedged = set()
+
+    def set_hedging(self, url, enabled):
+        if not enabled:
+            self.unhedged.add(url)
+
+    async def get(self, url, headers=None, **kwargs):
+        self.sent.append((url, headers))
+        return self.responses.pop(0)
+
+
+class FakeValidators:
+    def __init__(self):
+        self.rows = {}
+
+    async def get(self, url):
+        return self.rows.get(url)
+
+    async def set(self, url, etag, last_modified, body):
+        self.rows[url] = {"etag": etag, "last_modified": last_modified, "body": body}
+
+
+def limit_at(remaining, reset_in, **options):
+    limit = GitHubRateLimit(**options)
+    limit.update({"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset": str(time.time() + reset_in)})
+    return limit
+
+
+def test_delay_by_remaining_quota():
+    assert GitHubRateLimit().delay() == 0.0  # nothing known yet
+    assert limit_at(100, 600).delay() == 0.0
+    assert limit_at(3, -1).delay() == 0.0  # already reset
+
+    # spread the last calls over the time left, capped
+    assert abs(limit_at(10, 5).delay() - 0.5) < 0.05
+    assert limit_at(10, 600).delay() == 2.0
+
+    # at the reserve: wait for a close reset, skip a far one
+    assert 0 < limit_at(5, 1).delay() <= 1
+    assert limit_at(5, 600).delay() is None
+
+
+def test_not_modified_reuses_stored_body():
+    body = '{"tag_name": "v2.0.0"}'
+    http = FakeHTTP(
+        httpx.Response(200, text=body, headers={"ETag": '"abc"'}),
+        httpx.Response(304),
+    )
+    gh = GitHubService(http=http, validators=FakeValidators(), base_url="https://gh.test")
+
+    first = asyncio.run(gh.fetch_latest_release("encode", "httpx"))
+    second = asyncio.run(gh.fetch_latest_release("encode", "httpx"))
+
+    assert first == second == {"tag_name": "v2.0.0"}
+    assert "If-None-Match" not in http.sent[0][1]
+    assert http.sent[1][1]["If-None-Match"] == '"abc"'
+    assert "https://gh.test" in http.unhedged
+
+
+def test_skipped_call_is_not_a_known_miss():
+    http = FakeHTTP()
+    gh = GitHubService(http=http, rate_limit=limit_at(0, 600), base_url="https://gh.test")
+
+    assert asyncio.run(gh.fetch_latest_release("encode", "httpx")) is None
+    assert http.sent == []
+    assert not gh.is_known_missing("encode", "httpx")
+
+
+def test_no_releases_or_tags_is_remembered():
+    http = FakeHTTP(httpx.Response(404), httpx.Response(200, text="[]"))
+    gh = GitHubService(http=http, base_url="https://gh.test")
+
+    assert asyncio.run(gh.fetch_latest_release("a", "B")) is None
+    assert gh.is_known_missing("a", "b")
+    assert asyncio.run(gh.fetch_latest_release("a", "b")) is None
+    assert len(http.sent) == 2
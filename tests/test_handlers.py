@@ -0,0 +1,158 @@
+# tests/test_handlers.py
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app import main
+from app.cache_service import SQLiteCache, TieredCache
+from app.entity_extractor import EntityExtractor
+from app.fallback_service import TECH_MAP, TECH_SYNONYMS
+from app.formatter import Formatter
+from app.knowledge_base import KnowledgeBase
+from app.memory_cache import MemoryCache
+from app.task_service import TaskRunner, TaskStore
+
+
+class StubLookup:
+    """Stands in for LookupService: no network, reports two sources."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def lookup(self, text, package=None, wiki_title=None, on_source=None):
+        self.calls.append(text)
+        await asyncio.sleep(self.delay)
+        if on_source:
+            on_source("wikipedia", {"extract": f"{text} is a library."})
+            on_source("npm", {"version": "1.0.0"})
+        return {"name": text, "usage": f"{text} is a library.", "latest_version": "1.0.0"}
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    kb_path = tmp_path / "libraries.yaml"
+    kb_path.write_text("{}\n", encoding="utf-8")
+    formatter = Formatter()
+    store = SQLiteCache(str(tmp_path / "cache.db"))
+    lookup = StubLookup(delay=0.05)
+    for name, value in {
+        "formatter": formatter,
+        "cache": TieredCache(store, MemoryCache(), prepare=formatter.prepare_cached),
+        "kb": KnowledgeBase(str(kb_path)),
+        "extractor": EntityExtractor.build(TECH_SYNONYMS, TECH_MAP),
+        "lookup": lookup,
+        "tasks": TaskStore(),
+        "coordinator": None,
+    }.items():
+        monkeypatch.setattr(main, name, value)
+    yield lookup
+    asyncio.run(store.close())
+
+
+def send(req_id, text, method="message/send", **configuration):
+    params = {"message": {"kind": "message", "role": "user", "parts": [{"kind": "text", "text": text}]}}
+    if configuration:
+        params["configuration"] = configuration
+    return {"jsonrpc": "2.0", "id": req_id, "method": method, "params": params}
+
+
+def test_batch_shares_duplicate_lookups_and_reports_errors_per_item(stub):
+    items = [
+        send("1", "fastify"),
+        send("2", "What is Fastify?"),
+        {**send("3", "fastify"), "method": "tasks/get"},  # message params on tasks/get
+        {"id": "4", "method": "message/send"},
+    ]
+
+    responses = asyncio.run(main.handle_batch(items))
+
+    assert stub.calls == ["fastify"]
+    assert [r["id"] for r in responses] == ["1", "2", "3", "4"]
+    assert [r["result"]["status"]["state"] for r in responses[:2]] == ["completed", "completed"]
+    assert [r["error"]["code"] for r in responses[2:]] == [-32602, -32600]
+
+
+def test_tasks_get_rejects_message_params(stub):
+    status, content = asyncio.run(main.handle_rpc({**send("1", "fastify"), "method": "tasks/get"}))
+    assert status == 400
+    assert content["error"] == {"code": -32602, "message": "Invalid params"}
+
+
+def test_stream_sends_working_sources_then_the_task(stub):
+    rpc, messages, text, error = main.parse_rpc(send("s", "fastify", method="message/stream"))
+    assert error is None
+
+    async def collect():
+        return [chunk async for chunk in main.stream_rpc(rpc, messages, text)]
+
+    events = [json.loads(chunk[len("data: "):]) for chunk in asyncio.run(collect())]
+
+    kinds = [e["result"]["kind"] for e in events]
+    assert kinds == ["status-update", "artifact-update", "artifact-update", "task"]
+    assert events[0]["result"]["status"]["state"] == "working"
+    sources = [e["result"]["artifact"]["parts"][0]["data"]["source"] for e in events[1:3]]
+    assert sources == ["wikipedia", "npm"]
+    assert events[-1]["result"]["status"]["state"] == "completed"
+
+
+def test_non_blocking_send_goes_from_working_to_completed(stub, monkeypatch):
+    async def run():
+        runner = TaskRunner(workers=1)
+        monkeypatch.setattr(main, "runner", runner)
+        runner.start()
+        _, working = await main.handle_rpc(send("1", "fastify", blocking=False))
+        task_id = working["result"]["id"]
+        get = {"jsonrpc": "2.0", "id": "2", "method": "tasks/get", "params": {"id": task_id}}
+
+        _, first = await main.handle_rpc(get)
+        for _ in range(100):
+            _, last = await main.handle_rpc(get)
+            if last["result"]["status"]["state"] != "working":
+                break
+            await asyncio.sleep(0.01)
+        await runner.close()
+        return working, first, last
+
+    working, first, last = asyncio.run(run())
+    assert working["result"]["status"]["state"] == "working"
+    assert first["result"]["status"]["state"] == "working"
+    assert last["result"]["status"]["state"] == "completed"
+    assert last["result"]["id"] == working["result"]["id"]
+
+
+def test_stale_kb_version_is_refreshed_in_the_background(stub, tmp_path, monkeypatch):
+    kb_path = tmp_path / "kb.yaml"
+    kb_path.write_text("fastify:\n  name: Fastify\n  version: '4.0.0'\n", encoding="utf-8")
+    monkeypatch.setattr(main, "kb", KnowledgeBase(str(kb_path), version_ttl=0))
+
+    async def slow_registry(record, key):
+        await asyncio.sleep(0.2)
+        return "5.0.0"
+
+    monkeypatch.setattr(main, "fetch_registry_version", slow_registry)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first = await main.answer_from_kb("fastify")
+        elapsed = loop.time() - start
+        await asyncio.gather(*main.refreshes)
+        return first, elapsed, main.kb.get("fastify")["version"]
+
+    first, elapsed, refreshed = asyncio.run(run())
+    assert elapsed < 0.1
+    assert first["latest_version"] == "4.0.0"
+    assert refreshed == "5.0.0"
+
+
+def test_extractor_rebuild_picks_up_knowledge_base_names(stub, tmp_path, monkeypatch):
+    kb_path = tmp_path / "kb.yaml"
+    kb_path.write_text("fastify:\n  name: Fastify\n  aliases: [fastifyjs]\n", encoding="utf-8")
+    monkeypatch.setattr(main, "kb", KnowledgeBase(str(kb_path)))
+
+    asyncio.run(main.rebuild_extractor())
+    assert main.resolve_entity("what is fastifyjs?").canonical == "fastify"
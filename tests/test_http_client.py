@@ -0,0 +1,76 @@
+# tests/test_http_client.py
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.http_client import HTTPClientPool
+from app.resilience import Resilience
+
+URL = "https://upstream.test/item"
+
+
+class SlowThenFast:
+    """MockTransport handler: the first request is slow, later ones answer at once."""
+
+    def __init__(self, slow=0.5):
+        self.slow = slow
+        self.started = 0
+        self.finished = 0
+        self.cancelled = 0
+
+    async def __call__(self, request):
+        self.started += 1
+        try:
+            if self.started == 1:
+                await asyncio.sleep(self.slow)
+            self.finished += 1
+            return httpx.Response(200, json={"n": self.started})
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def make_pool(handler, hedge_after=0.05):
+    pool = HTTPClientPool(resilience=Resilience(min_samples=5))
+    pool._clients["https://upstream.test"] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    health = pool.resilience.host("https://upstream.test")
+    for _ in range(5):
+        health.record(hedge_after, True)
+    return pool, health
+
+
+def test_slow_get_is_hedged_and_the_loser_cancelled():
+    handler = SlowThenFast()
+
+    async def main():
+        pool, health = make_pool(handler)
+        start = time.perf_counter()
+        r = await pool.get(URL)
+        elapsed = time.perf_counter() - start
+        await asyncio.sleep(0)
+        await pool.aclose()
+        return r, elapsed, health
+
+    r, elapsed, health = asyncio.run(main())
+    assert r.json() == {"n": 2}
+    assert elapsed < 0.3
+    assert health.hedged == 1
+    assert handler.cancelled == 1
+
+
+def test_caller_cancelled_before_the_hedge_cancels_the_request():
+    handler = SlowThenFast(slow=0.3)
+
+    async def main():
+        pool, health = make_pool(handler, hedge_after=0.2)
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.get(URL), 0.05)
+        await asyncio.sleep(0.4)
+        await pool.aclose()
+        return health
+
+    health = asyncio.run(main())
+    assert (handler.started, handler.finished, handler.cancelled) == (1, 0, 1)
+    assert health.hedged == 0
@@ -0,0 +1,40 @@
+# tests/test_json_stream.py
+import json
+
+from app.json_stream import JSONFieldReader
+
+
+def _feed(doc: bytes, field: str, size: int):
+    reader = JSONFieldReader(field)
+    read = 0
+    for i in range(0, len(doc), size):
+        read += size
+        if reader.feed(doc[i:i + size]):
+            break
+    return reader, read
+
+
+def test_extracts_field_and_stops_before_the_rest():
+    doc = json.dumps({
+        "info": {"name": "x", "summary": 'braces { } and "quotes" \\ inside', "tags": [1, {"a": []}]},
+        "last_serial": 1,
+        "releases": {str(v): [{"url": "u" * 100}] for v in range(200)},
+    }).encode()
+
+    for size in (1, 7, 4096):
+        reader, read = _feed(doc, "info", size)
+        assert reader.done
+        assert reader.value["summary"] == 'braces { } and "quotes" \\ inside'
+        assert reader.value["tags"] == [1, {"a": []}]
+        if size < 4096:
+            assert read < len(doc) // 10
+
+
+def test_scalar_and_missing_fields():
+    doc = b'{"a": {"info": 1}, "n": 42, "s": "x,y"}'
+    assert _feed(doc, "n", 3)[0].value == 42
+    assert _feed(doc, "s", 3)[0].value == "x,y"
+
+    reader, _ = _feed(doc, "info", 3)  # only top-level keys count
+    assert reader.value is None
+    assert reader.done
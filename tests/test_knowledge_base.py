@@ -0,0 +1,68 @@
+# tests/test_knowledge_base.py
+import json
+import os
+import time
+
+from app.entity_extractor import EntityExtractor
+from app.knowledge_base import KnowledgeBase
+
+
+def test_loads_curated_yaml(tmp_path):
+    path = tmp_path / "libraries.yaml"
+    path.write_text(open("data/libraries.yaml", encoding="utf-8").read(), encoding="utf-8")
+    kb = KnowledgeBase(str(path))
+
+    assert len(kb) == 2
+    record = kb.get("React")
+    assert record["version"] == "18.2.0"
+    payload = kb.to_payload(record)
+    assert payload["installation"] == ["npm install react react-dom"]
+    assert payload["source"] == "knowledge-base"
+    assert kb.registry_of(kb.get("django")) == "pypi"
+    assert os.path.exists(str(path) + ".kbc")
+
+
+def test_jsonl_reload_and_compiled_cache(tmp_path):
+    path = tmp_path / "kb.jsonl"
+    path.write_text(json.dumps({"key": "vite", "name": "Vite", "aliases": ["vitejs"]}) + "\n")
+    kb = KnowledgeBase(str(path))
+    assert kb.get("vitejs")["name"] == "Vite"
+    assert not kb.reload_if_changed()
+
+    time.sleep(0.01)
+    path.write_text(
+        json.dumps({"key": "vite", "name": "Vite"}) + "\n"
+        + json.dumps({"key": "bun", "name": "Bun", "version": 1.1}) + "\n"
+    )
+    assert kb.reload_if_changed()
+    assert kb.get("bun")["version"] == "1.1"
+    assert "vitejs" not in kb
+
+    # a fresh instance is served from the compiled sidecar
+    assert KnowledgeBase(str(path)).get("bun")["name"] == "Bun"
+
+
+def test_version_staleness_and_merge(tmp_path):
+    path = tmp_path / "kb.jsonl"
+    path.write_text(json.dumps({"key": "vite", "name": "Vite", "version": "5.0"}) + "\n")
+    kb = KnowledgeBase(str(path), version_ttl=0)
+
+    assert kb.is_version_stale("vite")
+    kb.merge_version("vite", "5.4.1")
+    assert kb.get("vite")["version"] == "5.4.1"
+    kb.version_ttl = 60
+    assert not kb.is_version_stale("vite")
+
+
+def test_records_carry_aliases_to_the_extractor(tmp_path):
+    path = tmp_path / "kb.jsonl"
+    path.write_text(json.dumps({
+        "key": "django-rest-framework", "name": "Django REST framework",
+        "aliases": ["djangorestframework", "DRF"], "package": "djangorestframework",
+    }) + "\n", encoding="utf-8")
+    kb = KnowledgeBase(str(path))
+    extractor = EntityExtractor.build({}, {}, kb.records())
+
+    entity = extractor.extract("tell me about djangorestframework please")
+    assert entity.canonical == "django-rest-framework"
+    assert kb.get(entity.canonical)["name"] == "Django REST framework"
@@ -0,0 +1,207 @@
+# tests/test_lookup_service.py
+import asyncio
+
+from app.cache_service import SQLiteCache, SourceCache
+from app.formatter import Formatter
+from app.lookup_service import LookupService
+
+
+class FakeWiki:
+    def __init__(self, resp=None, delay=0.0):
+        self.resp = resp
+        self.delay = delay
+
+    async def fetch_summary(self, q, hint=None):
+        await asyncio.sleep(self.delay)
+        return self.resp
+
+    def is_known_missing(self, q):
+        return True
+
+
+class FakeRegistry:
+    def __init__(self, npm=None, pypi=None, delay=0.0):
+        self.npm = npm
+        self.pypi = pypi
+        self.delay = delay
+
+    async def fetch_npm_latest(self, q):
+        await asyncio.sleep(self.delay)
+        return self.npm
+
+    async def fetch_pypi_info(self, q):
+        await asyncio.sleep(self.delay)
+        return self.pypi
+
+    def is_known_missing(self, source, q):
+        return True
+
+
+class FakeGitHub:
+    def __init__(self, resp={"tag_name": "v1.0.0"}, missing=True):
+        self.calls = []
+        self.resp = resp
+        self.missing = missing
+
+    async def fetch_latest_release(self, owner, repo):
+        self.calls.append((owner, repo))
+        return self.resp
+
+    def is_known_missing(self, owner, repo):
+        return self.missing
+
+
+class FakeFallback:
+    def __init__(self, text=None):
+        self.text = text
+        self.calls = 0
+
+    async def fetch_text(self, q, context=None):
+        self.calls += 1
+        return self.text
+
+
+def test_sources_run_concurrently():
+    reg = FakeRegistry(npm={"version": "18.2.0", "description": "React"}, pypi=None, delay=0.2)
+    wiki = FakeWiki({"description": "UI library", "extract": "React is..."}, delay=0.2)
+    svc = LookupService(wiki, reg, FakeGitHub(), FakeFallback(), Formatter())
+
+    async def timed():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await svc.lookup("react")
+        return result, loop.time() - start
+
+    result, elapsed = asyncio.run(timed())
+    assert elapsed < 0.35
+    assert result["latest_version"] == "18.2.0"
+    assert result["purpose"] == "UI library"
+    assert "_partial" not in result
+
+
+def test_slow_source_yields_partial_result():
+    reg = FakeRegistry(npm={"version": "1.2.3"}, pypi=None)
+    wiki = FakeWiki({"extract": "never arrives"}, delay=1.0)
+    fallback = FakeFallback("from fallback")
+    svc = LookupService(wiki, reg, FakeGitHub(), fallback, Formatter(),
+                        deadlines={"wikipedia": 0.05})
+
+    result = asyncio.run(svc.lookup("thing"))
+    assert result["_partial"] == ["wikipedia"]
+    assert result["latest_version"] == "1.2.3"
+    assert fallback.calls == 1
+
+
+def test_github_release_follows_wikipedia_link():
+    gh = FakeGitHub()
+    wiki = FakeWiki({"content_urls": {"desktop": {"page": "https://github.com/acme/tool"}}})
+    svc = LookupService(wiki, FakeRegistry(), gh, FakeFallback(), Formatter())
+
+    result = asyncio.run(svc.lookup("tool"))
+    assert gh.calls == [("acme", "tool")]
+    assert result["latest_version"] == "v1.0.0"
+
+
+def test_skipped_github_call_is_partial():
+    # rate-limited: no answer, but not a known miss either
+    gh = FakeGitHub(resp=None, missing=False)
+    wiki = FakeWiki({"content_urls": {"desktop": {"page": "https://github.com/acme/tool"}}})
+    svc = LookupService(wiki, FakeRegistry(), gh, FakeFallback(), Formatter())
+
+    result = asyncio.run(svc.lookup("tool"))
+    assert result["_partial"] == ["github"]
+
+
+class CountingRegistry(FakeRegistry):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.missing = True
+
+    async def fetch_npm_latest(self, q):
+        self.calls += 1
+        return await super().fetch_npm_latest(q)
+
+    def is_known_missing(self, source, q):
+        return self.missing
+
+
+def test_source_cache_refreshes_only_expired_sources(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"))
+    sources = SourceCache(store, ttls={"npm": 0})
+    wiki = FakeWiki({"description": "UI library", "extract": "React is...", "extra": "x" * 100})
+    reg = CountingRegistry(npm={"version": "18.2.0", "readme": "big"})
+    svc = LookupService(wiki, reg, FakeGitHub(), FakeFallback(), Formatter(), sources=sources)
+
+    async def main():
+        first = await svc.lookup("react")
+        wiki.resp = None  # wikipedia part must now come from the source cache
+        second = await svc.lookup("react")
+        part = await sources.get_entry("wikipedia", "react")
+        await store.close()
+        return first, second, part
+
+    first, second, part = asyncio.run(main())
+    assert reg.calls == 2  # npm TTL is 0, so it is re-queried
+    assert second["purpose"] == first["purpose"] == "UI library"
+    assert "extra" not in part[0]
+
+
+def test_composed_ttl_is_the_shortest_source_ttl(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"))
+    sources = SourceCache(store, ttls={"wikipedia": 86400, "npm": 600, "pypi": 3600})
+    reg = FakeRegistry(npm={"version": "18.2.0"})
+    svc = LookupService(FakeWiki({"extract": "x"}), reg, FakeGitHub(), FakeFallback(), Formatter(),
+                        sources=sources)
+
+    async def main():
+        first = await svc.lookup("react")
+        second = await svc.lookup("react")  # every part from the source cache
+        await store.close()
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first["_ttl"] == 600
+    assert 590 <= second["_ttl"] <= 600
+
+
+def test_failed_source_is_partial_and_not_cached(tmp_path):
+    store = SQLiteCache(str(tmp_path / "cache.db"))
+    sources = SourceCache(store)
+    reg = CountingRegistry(npm=None)
+    reg.missing = False  # None without a recorded 404 means the call failed
+    svc = LookupService(FakeWiki({"extract": "x"}), reg, FakeGitHub(), FakeFallback(), Formatter(),
+                        sources=sources)
+
+    async def main():
+        result = await svc.lookup("thing")
+        part = await sources.get_entry("npm", "thing")
+        await store.close()
+        return result, part
+
+    result, part = asyncio.run(main())
+    assert result["_partial"] == ["npm", "pypi"]
+    assert part is None
+
+
+def test_on_source_reports_each_source_as_it_resolves():
+    reg = FakeRegistry(npm={"version": "1.0.0"}, pypi=None)
+    wiki = FakeWiki({"extract": "slow"}, delay=0.05)
+    svc = LookupService(wiki, reg, FakeGitHub(), FakeFallback(), Formatter())
+    events = []
+
+    asyncio.run(svc.lookup("thing", on_source=lambda source, resp: events.append(source)))
+    assert events[-1] == "wikipedia"
+    assert set(events) == {"wikipedia", "npm", "pypi"}
+
+
+def test_fallback_reuses_registry_results_from_the_lookup():
+    from app.fallback_service import FallbackService
+
+    reg = CountingRegistry(npm={"version": "1.0.0", "description": "A tool"})
+    fallback = FallbackService(registry=reg)
+    svc = LookupService(FakeWiki(None), reg, FakeGitHub(), fallback, Formatter())
+
+    result = asyncio.run(svc.lookup("tool"))
+    assert reg.calls == 1
+    assert result["latest_version"] == "1.0.0"
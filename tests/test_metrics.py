@@ -0,0 +1,50 @@
+# tests/test_metrics.py
+import asyncio
+
+from app.metrics import MetricsMiddleware, Registry, RequestTiming, current_timing, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    h = registry.histogram("x_seconds", "X.", ("host",), buckets=(0.1, 1.0))
+    h.observe(0.05, "a")
+    h.observe(0.1, "a")
+    h.observe(5.0, "a")
+    registry.counter("hits", "Hits.", ("result",)).inc("hit")
+
+    text = registry.render()
+    assert 'x_seconds_bucket{host="a",le="0.1"} 2' in text
+    assert 'x_seconds_bucket{host="a",le="1.0"} 2' in text
+    assert 'x_seconds_bucket{host="a",le="+Inf"} 3' in text
+    assert 'x_seconds_count{host="a"} 3' in text
+    assert 'hits_total{result="hit"} 1.0' in text
+    assert "# HELP hits_total Hits.\n# TYPE hits_total counter" in text
+
+
+def test_timed_stages_end_up_in_server_timing_header():
+    async def app(scope, receive, send):
+        with timed("cache"):
+            await asyncio.sleep(0.01)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def main():
+        await MetricsMiddleware(app, paths=("/a2a/dev",))({"type": "http", "path": "/a2a/dev"}, None, send)
+
+    asyncio.run(main())
+    header = dict(sent[0]["headers"])[b"server-timing"].decode()
+    assert header.startswith("cache;dur=")
+    assert "total;dur=" in header
+    assert current_timing.get() is None
+
+
+def test_request_timing_accumulates_repeated_stages():
+    timing = RequestTiming()
+    timing.add("render", 0.001)
+    timing.add("render", 0.002)
+    assert timing.header() == "render;dur=3.0"
@@ -0,0 +1,28 @@
+# tests/test_negative_cache.py
+import time
+
+from app.negative_cache import NegativeCache
+
+
+def test_misses_expire_per_source():
+    neg = NegativeCache(ttls={"npm": 0.01, "pypi": 60})
+    neg.mark_missing("npm", "what is react")
+    neg.mark_missing("pypi", "what is react")
+
+    assert neg.is_missing("npm", "what is react")
+    assert not neg.is_missing("wikipedia", "what is react")
+    time.sleep(0.02)
+    assert not neg.is_missing("npm", "what is react")
+    assert neg.is_missing("pypi", "what is react")
+    assert neg.stats()["skipped"] == {"npm": 1, "pypi": 1}
+
+
+def test_bounded_and_forgettable():
+    neg = NegativeCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        neg.mark_missing("npm", key)
+
+    assert not neg.is_missing("npm", "a")
+    assert neg.is_missing("npm", "c")
+    neg.forget("npm", "c")
+    assert not neg.is_missing("npm", "c")
@@ -0,0 +1,71 @@
+# tests/test_prefetch.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app import main
+from app.prefetch import prefetch
+
+
+class StubLookup:
+    """Built by ensure_upstreams in place of LookupService; "flaky" always fails on npm."""
+
+    instances = []
+
+    def __init__(self, *args, budget=12.0, sources=None, **kwargs):
+        self.budget = budget
+        self.deadlines = {"wikipedia": 1.0, "npm": 1.0}
+        self.reuse_sources = True
+        self.calls = []
+        StubLookup.instances.append(self)
+
+    async def lookup(self, text, package=None, wiki_title=None, on_source=None):
+        self.calls.append((text, self.reuse_sources))
+        result = {"name": text, "usage": f"{text} is a library."}
+        if text == "flaky":
+            result["_partial"] = ["npm"]
+        return result
+
+
+@pytest.fixture
+def calls(tmp_path, monkeypatch):
+    kb_path = tmp_path / "libraries.yaml"
+    kb_path.write_text("react:\n  name: React\n  version: '18.2.0'\n", encoding="utf-8")
+    monkeypatch.setattr(main, "DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(main, "LIBRARIES_PATH", str(kb_path))
+    monkeypatch.setattr(main, "SNAPSHOT_PATH", None)
+    monkeypatch.setattr(main, "WORKER_COORDINATION", False)
+    monkeypatch.setattr(main, "LookupService", StubLookup)
+    StubLookup.instances = []
+
+    def run(names, **kwargs):
+        report = asyncio.run(prefetch(names, **kwargs))
+        return report, StubLookup.instances[-1].calls
+
+    return run
+
+
+def test_rerun_skips_what_is_cached_and_reports_counts(calls):
+    names = ["React", "fastify", "What is Fastify?", "flaky"]
+
+    first, looked_up = calls(names)
+    assert sorted(looked_up) == [("fastify", True), ("flaky", True)]
+    assert first["names"] == 4
+    assert first["entities"] == 3
+    assert first["counts"] == {"knowledge_base": 1, "fetched": 1, "partial": 1}
+    assert first["failures_by_source"] == {"npm": 1}
+    assert first["coverage"] == round(2 / 3, 4)
+
+    # the partial result was not cached, so only it is looked up again
+    second, looked_up = calls(names)
+    assert looked_up == [("flaky", True)]
+    assert second["counts"] == {"knowledge_base": 1, "already_cached": 1, "partial": 1}
+
+
+def test_force_refetches_every_source(calls):
+    calls(["fastify"])
+    report, looked_up = calls(["fastify"], force=True)
+    assert looked_up == [("fastify", False)]
+    assert report["counts"] == {"fetched": 1}
@@ -0,0 +1,51 @@
+# tests/test_resilience.py
+from app.resilience import HostHealth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_opens_then_probes_and_closes():
+    clock = FakeClock()
+    health = HostHealth(min_requests=4, error_threshold=0.5, open_seconds=10, clock=clock)
+    for ok in (True, False, False, False):
+        health.record(0.1, ok)
+
+    assert health.state == HostHealth.OPEN
+    assert not health.allow()
+
+    clock.now = 11
+    assert health.allow()       # the single half-open probe
+    assert not health.allow()   # everyone else still fails fast
+    health.record(0.1, True)
+    assert health.state == HostHealth.CLOSED
+    assert health.allow()
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    health = HostHealth(min_requests=2, open_seconds=5, clock=clock)
+    health.record(0.1, False)
+    health.record(0.1, False)
+    clock.now = 6
+    assert health.allow()
+    health.record(0.1, False)
+    assert health.state == HostHealth.OPEN
+    assert not health.allow()
+
+
+def test_adaptive_timeout_and_hedge_delay_follow_percentiles():
+    health = HostHealth(min_samples=10, timeout_factor=3, min_timeout=0.5)
+    assert health.timeout(8.0) == 8.0
+    assert health.hedge_delay() is None
+
+    for i in range(100):
+        health.record(0.1 + i * 0.001, True)
+
+    assert 0.5 <= health.timeout(8.0) < 1.0
+    assert 0.19 <= health.hedge_delay() <= 0.2
@@ -0,0 +1,65 @@
+# tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"name": "react"}
+
+    async def main():
+        return await asyncio.gather(*(flights.do("react", work) for _ in range(10)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(r == {"name": "react"} for r in results)
+    assert flights.stats() == {"in_flight": 0, "executed": 1, "shared": 9, "failed": 0}
+
+
+def test_error_reaches_all_callers_and_is_not_sticky():
+    flights = SingleFlight()
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        results = await asyncio.gather(
+            flights.do("k", boom), flights.do("k", boom), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+        return await flights.do("k", ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert flights.failed == 1
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return 42
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 42
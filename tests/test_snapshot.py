@@ -0,0 +1,76 @@
+# tests/test_snapshot.py
+import asyncio
+from datetime import datetime, timedelta
+
+from app.cache_service import SQLiteCache, TieredCache
+from app.memory_cache import MemoryCache
+from app.snapshot import Snapshot, export_snapshot, write_snapshot
+
+
+def _fill(db, items, hot):
+    store = SQLiteCache(db)
+
+    async def main():
+        await store.set_many(items)
+        for key in hot:
+            store.touch(key)
+        await store.close()  # writes the touches
+
+    asyncio.run(main())
+
+
+def test_export_keeps_the_hottest_entries(tmp_path):
+    db, path = str(tmp_path / "cache.db"), str(tmp_path / "snap.bin")
+    _fill(db, [(f"k{i}", {"i": i, "text": "x" * (i * 100)}) for i in range(10)], hot=["k3", "k7", "k7"])
+
+    assert export_snapshot(db, path, limit=2) == 2
+    snapshot = Snapshot.open(path)
+    payload, updated_at = snapshot.get_entry("k7")
+    assert payload == {"i": 7, "text": "x" * 700}
+    assert isinstance(updated_at, datetime)
+    assert snapshot.get_entry("k3")[0]["i"] == 3
+    assert snapshot.get_entry("k1") is None
+    assert "k3" in snapshot and "nope" not in snapshot
+    assert snapshot.stats()["entries"] == 2
+    snapshot.close()
+
+
+def test_open_rejects_missing_and_foreign_files(tmp_path):
+    junk = tmp_path / "junk.bin"
+    junk.write_bytes(b"not a snapshot at all, just some bytes")
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    assert Snapshot.open(str(tmp_path / "missing.bin")) is None
+    assert Snapshot.open(str(junk)) is None
+    assert Snapshot.open(str(empty)) is None
+    assert Snapshot.open(None) is None
+
+
+def test_tiered_cache_serves_snapshot_before_sqlite_until_rewritten(tmp_path):
+    path = str(tmp_path / "snap.bin")
+    fresh = datetime.utcnow().isoformat()
+    old = (datetime.utcnow() - timedelta(days=30)).isoformat()
+    write_snapshot(path, [
+        ("react", b"\x01" + b'{"name": "react"}', fresh),
+        ("stale", b"\x01" + b'{"name": "stale"}', old),
+    ])
+    store = SQLiteCache(str(tmp_path / "cache.db"), ttl_days=14)
+    cache = TieredCache(store, MemoryCache(max_entries=1), snapshot=Snapshot.open(path))
+
+    async def main():
+        first = await cache.get("react")
+        misses_after_snapshot_hit = store.misses
+        stale = await cache.get("stale")  # not fresh in the snapshot: asks SQLite
+        await cache.set("react", {"name": "react", "v": 2})
+        await cache.set("vue", {"name": "vue"})  # evicts react from the one-entry memory tier
+        rewritten = await cache.get("react")
+        await store.close()
+        return first, misses_after_snapshot_hit, stale, rewritten
+
+    first, misses, stale, rewritten = asyncio.run(main())
+    assert first == {"name": "react"}
+    assert misses == 0
+    assert stale is None
+    assert rewritten == {"name": "react", "v": 2}
+    assert cache.stats()["snapshot"]["hits"] == 2
+    cache.snapshot.close()
@@ -0,0 +1,27 @@
+# tests/test_task_service.py
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+from app.task_service import PushNotifier
+
+
+def test_push_retries_server_errors_then_delivers():
+    seen = []
+
+    def receiver(request):
+        seen.append((request.url.host, request.headers.get("Authorization")))
+        return httpx.Response(503 if len(seen) == 1 else 200)
+
+    async def main():
+        notifier = PushNotifier(backoff=0)
+        notifier.http = httpx.AsyncClient(transport=httpx.MockTransport(receiver))
+        ok = await notifier.deliver(SimpleNamespace(url="https://hooks.example/t", token="s3"), {"id": "t1"})
+        await notifier.close()
+        return ok, notifier.stats()
+
+    ok, stats = asyncio.run(main())
+    assert ok
+    assert seen == [("hooks.example", "Bearer s3")] * 2
+    assert stats == {"pending": 0, "delivered": 1, "failed": 0}
@@ -0,0 +1,64 @@
+# tests/test_wikipedia_service.py
+import asyncio
+
+import httpx
+
+from app.wikipedia_service import WikipediaService
+
+SUMMARY = {"title": "React (software)", "extract": "React is a library.", "description": "JavaScript library"}
+QUERY = {"query": {
+    "normalized": [{"from": "React_(software)", "to": "React (software)"}],
+    "pages": [{"title": "React (software)"}, {"title": "React", "missing": True}],
+}}
+
+
+class FakeHTTP:
+    def __init__(self, summary_status=200):
+        self.summary_status = summary_status
+        self.sent = []
+
+    async def get(self, url, params=None, **kwargs):
+        if url.endswith("/w/api.php"):
+            self.sent.append("query")
+            return httpx.Response(200, json=QUERY)
+        self.sent.append("summary")
+        if self.summary_status != 200:
+            return httpx.Response(self.summary_status)
+        return httpx.Response(200, json=SUMMARY)
+
+
+class FakeTitles:
+    def __init__(self, **rows):
+        self.rows = rows
+
+    async def get(self, query):
+        return self.rows.get(query)
+
+    async def set(self, query, page_title):
+        if page_title is None:
+            self.rows.pop(query, None)
+        else:
+            self.rows[query] = page_title
+
+
+def test_first_and_repeat_lookups_return_the_same_summary():
+    http = FakeHTTP()
+    wiki = WikipediaService(http=http, titles=FakeTitles())
+
+    first = asyncio.run(wiki.fetch_summary("react", hint="React_(software)"))
+    second = asyncio.run(wiki.fetch_summary("react", hint="React_(software)"))
+
+    assert first == second == SUMMARY
+    assert http.sent == ["query", "summary", "summary"]
+
+
+def test_learned_title_is_forgotten_only_on_404():
+    titles = FakeTitles(react="React (software)")
+    wiki = WikipediaService(http=FakeHTTP(summary_status=503), titles=titles)
+
+    assert asyncio.run(wiki.fetch_summary("react")) is None
+    assert titles.rows == {"react": "React (software)"}
+
+    wiki.http = FakeHTTP(summary_status=404)
+    asyncio.run(wiki.fetch_summary("react", hint="React_(software)"))
+    assert wiki.http.sent[:2] == ["summary", "query"]